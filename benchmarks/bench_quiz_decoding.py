@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+CPU per request of quiz submission decoding: json.loads + QuizSubmission(**data)
+versus QuizSubmission.model_validate_json straight from bytes
+
+Usage: python -m benchmarks.bench_quiz_decoding [--requests 50000]
+"""
+import argparse
+import json
+import time
+
+from fastapi import HTTPException
+from fastapi.exceptions import RequestValidationError
+
+from webapp.app import QuizSubmission, decode_submission
+
+PAYLOADS = {
+    "valid": json.dumps({
+        "user_id": "123456789",
+        "lesson_id": 1,
+        "answers": [
+            {"question_id": 1, "answer": "Научиться наблюдать за умом без суждения"},
+            {"question_id": 2, "answer": "Мягко вернуть внимание к дыханию"},
+            {"question_id": 3, "answer": "Каждый день хотя бы несколько минут"}
+        ],
+        "completion_time": 245
+    }, ensure_ascii=False).encode('utf-8'),
+    "bad json": b'{"user_id": "123456789", "lesson_id": 1, "answers": [',
+    "bad schema": b'{"user_id": "123456789", "lesson_id": "one", "answers": []}',
+}
+
+def decode_legacy(body: bytes) -> QuizSubmission:
+    """The original submit_quiz path, every failure became a 500"""
+    try:
+        data = json.loads(body.decode('utf-8'))
+        return QuizSubmission(**data)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+
+def cpu_per_call(decode, body: bytes, requests: int) -> float:
+    """Microseconds of process CPU time per decode"""
+    start = time.process_time()
+    for _ in range(requests):
+        try:
+            decode(body)
+        except (HTTPException, RequestValidationError):
+            pass
+    return (time.process_time() - start) / requests * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare quiz submission decoding paths")
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{'payload':<12} {'legacy':>10} {'fast path':>10} {'speedup':>8}")
+    for name, body in PAYLOADS.items():
+        legacy = cpu_per_call(decode_legacy, body, args.requests)
+        fast = cpu_per_call(decode_submission, body, args.requests)
+        print(f"{name:<12} {legacy:8.2f}us {fast:8.2f}us {legacy / fast:7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of DataManager serializers: full document save and load
+
+Usage: python -m benchmarks.bench_serializers [--users 10000 100000] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+
+from storage.json_backend import read_document, write_document
+from storage.serializers import SERIALIZERS, get_serializer
+
+def make_users(count: int) -> dict:
+    """Generate users shaped like real records"""
+    rng = random.Random(42)
+    users = {}
+    for i in range(count):
+        user_id = str(100000000 + i)
+        lessons = list(range(1, rng.randint(0, 3) + 1))
+        users[user_id] = {
+            "user_id": user_id,
+            "current_lesson": len(lessons) + 1,
+            "completed_lessons": lessons,
+            "achievements": rng.sample(["first_lesson", "quiz_master", "daily_practice"], rng.randint(0, 3)),
+            "total_time": rng.randint(0, 600),
+            "last_activity": f"2025-09-{rng.randint(1, 28):02d}T12:00:00.000000",
+            "meditation_streak": rng.randint(0, 30),
+            "coins": rng.randint(0, 1000),
+            "gifts_received": rng.sample(["gift_1", "gift_2", "gift_3"], rng.randint(0, 2)),
+            "quiz_scores": {str(lesson): rng.randint(0, 3) for lesson in lessons},
+            "payment_status": rng.choice(["free", "free", "paid"]),
+            "motivation": rng.choice(["stress_relief", "focus", "sleep"]),
+            "experience": rng.choice(["beginner", "intermediate", "advanced"])
+        }
+    return users
+
+async def measure(name: str, users: dict, directory: str, repeat: int) -> dict:
+    """Best-of-N save and load time for one serializer"""
+    serializer = get_serializer(name)
+    path = os.path.join(directory, f"users-{name}{serializer.extension}")
+    save_times, load_times = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await write_document(path, users, serializer)
+        save_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        loaded = await read_document(path, serializer)
+        load_times.append(time.perf_counter() - start)
+        assert len(loaded) == len(users)
+    return {
+        "save_ms": min(save_times) * 1000,
+        "load_ms": min(load_times) * 1000,
+        "size_kb": os.path.getsize(path) / 1024
+    }
+
+async def run(sizes, repeat: int) -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            users = make_users(size)
+            print(f"\n{size} users")
+            print(f"{'serializer':<12} {'save ms':>10} {'load ms':>10} {'size KB':>10}")
+            for name in SERIALIZERS:
+                try:
+                    result = await measure(name, users, directory, repeat)
+                except RuntimeError as e:
+                    print(f"{name:<12} skipped: {e}")
+                    continue
+                print(f"{name:<12} {result['save_ms']:>10.1f} {result['load_ms']:>10.1f} {result['size_kb']:>10.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark user data serializers")
+    parser.add_argument("--users", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.repeat))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Memory held by user records as plain dicts versus UserRecord
+
+Usage: python -m benchmarks.bench_user_records [--users 100000]
+"""
+import argparse
+import gc
+import json
+import tracemalloc
+
+from benchmarks.bench_serializers import make_users
+from models import UserRecord
+
+def measure(build) -> int:
+    """Bytes still allocated after build() returns its result"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare memory of dict and UserRecord users")
+    parser.add_argument("--users", type=int, default=100000)
+    args = parser.parse_args()
+
+    # Parse from JSON so both variants hold freshly decoded objects, as in production
+    document = json.dumps(make_users(args.users))
+
+    dict_bytes = measure(lambda: json.loads(document))
+    record_bytes = measure(lambda: {
+        user_id: UserRecord.from_dict(user_data)
+        for user_id, user_data in json.loads(document).items()
+    })
+
+    decoded = json.loads(document)
+
+    for user_id, user_data in decoded.items():
+        assert UserRecord.from_dict(user_data).to_dict() == user_data, user_id
+
+    print(f"{args.users} users")
+    print(f"dict:       {dict_bytes / 1024 / 1024:8.1f} MB  ({dict_bytes / args.users:.0f} B/user)")
+    print(f"UserRecord: {record_bytes / 1024 / 1024:8.1f} MB  ({record_bytes / args.users:.0f} B/user)")
+    print(f"ratio:      {record_bytes / dict_bytes:8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Load test of webapp.app:app driven in-process over ASGI, no sockets involved
+
+Usage: python -m benchmarks.bench_webapp [--requests 2000] [--concurrency 50]
+                                         [--scenario lesson_page ...] [--output bench-webapp.json]
+
+Every scenario runs --requests requests from --concurrency concurrent
+clients against a fresh data directory. Throughput and p50/p95/p99
+latency go to the console and to a JSON file, so runs can be compared
+across commits. Storage settings (STORAGE_MODE, SERIALIZER, ...) are
+taken from the environment, admission limits are switched off unless
+set explicitly.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+LESSON_ID = 1
+
+# Distinct users the check_completion clients ask about, most answers come from the micro-cache
+CHECKED_USERS = 100
+
+class ASGIDriver:
+    """Calls an ASGI app directly, the way uvicorn would for one connection"""
+
+    def __init__(self, app):
+        self.app = app
+        self._lifespan: Optional[asyncio.Task] = None
+        self._lifespan_in: "asyncio.Queue[dict]" = asyncio.Queue()
+        self._lifespan_out: "asyncio.Queue[dict]" = asyncio.Queue()
+
+    async def startup(self) -> None:
+        scope = {"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}
+        self._lifespan = asyncio.create_task(
+            self.app(scope, self._lifespan_in.get, self._lifespan_out.put)
+        )
+        await self._lifespan_in.put({"type": "lifespan.startup"})
+        message = await self._lifespan_out.get()
+        if message["type"] != "lifespan.startup.complete":
+            raise RuntimeError(f"App failed to start: {message.get('message', '')}")
+
+    async def shutdown(self) -> None:
+        if self._lifespan is None:
+            return
+        await self._lifespan_in.put({"type": "lifespan.shutdown"})
+        await self._lifespan_out.get()
+        await self._lifespan
+
+    async def request(self, method: str, path: str, query: Optional[dict] = None,
+                      body: bytes = b"", headers: Tuple[Tuple[str, str], ...] = ()) -> Tuple[int, bytes]:
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": method,
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": urlencode(query or {}).encode(),
+            "root_path": "",
+            "headers": [(b"host", b"bench")] + [
+                (name.lower().encode(), value.encode()) for name, value in headers
+            ] + ([(b"content-length", str(len(body)).encode())] if body else []),
+            "client": ("127.0.0.1", 50000),
+            "server": ("bench", 80),
+        }
+        request_sent = False
+        status = 0
+        chunks = []
+
+        async def receive() -> dict:
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Nothing else arrives, wait like an idle connection would
+            await asyncio.Event().wait()
+
+        async def send(message: dict) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, send)
+        return status, b"".join(chunks)
+
+def lesson_answers(lessons_dir: str) -> List[dict]:
+    """Correct answers of the benchmarked lesson"""
+    with open(os.path.join(lessons_dir, f"{LESSON_ID}.json"), 'r', encoding='utf-8') as f:
+        quiz = json.load(f)["quiz"]
+    return [
+        {"question_id": question["id"], "answer": question["options"][question["correct"]]}
+        for question in quiz
+    ]
+
+# Signs the benchmark's own WebApp init data
+BOT_TOKEN = "123456:bench"
+
+def sign_init_data(user_id: str) -> str:
+    """initData as Telegram would sign it for user_id"""
+    fields = {"auth_date": str(int(time.time())), "user": json.dumps({"id": int(user_id), "first_name": "Bench"})}
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", BOT_TOKEN.encode(), hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    return urlencode(fields)
+
+def make_scenarios(answers: List[dict]) -> Dict[str, Callable[[ASGIDriver, int], "asyncio.Future"]]:
+    """Scenario name -> coroutine function sending request number i"""
+    json_headers = (("content-type", "application/json"),)
+
+    def lesson_page(driver: ASGIDriver, i: int):
+        return driver.request("GET", f"/lesson/{LESSON_ID}", headers=(("accept-encoding", "gzip, br"),))
+
+    def submit_quiz(driver: ASGIDriver, i: int):
+        body = json.dumps({
+            "user_id": str(100000000 + i),
+            "lesson_id": LESSON_ID,
+            "answers": answers,
+            "completion_time": 245
+        }, ensure_ascii=False).encode('utf-8')
+        return driver.request("POST", "/api/submit-quiz", body=body, headers=json_headers)
+
+    def complete(driver: ASGIDriver, i: int):
+        user_id = str(100000000 + i)
+        body = json.dumps({"user_id": user_id, "score": len(answers), "percentage": 100.0}).encode()
+        headers = json_headers + (("x-telegram-init-data", sign_init_data(user_id)),)
+        return driver.request("POST", f"/api/lesson/{LESSON_ID}/complete", body=body, headers=headers)
+
+    def check_completion(driver: ASGIDriver, i: int):
+        return driver.request("GET", f"/api/lesson/{LESSON_ID}/check_completion",
+                              query={"user_id": str(100000000 + i % CHECKED_USERS)})
+
+    return {
+        "lesson_page": lesson_page,
+        "submit_quiz": submit_quiz,
+        "complete": complete,
+        "check_completion": check_completion,
+    }
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    index = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+async def run_scenario(driver: ASGIDriver, send: Callable, requests: int, concurrency: int) -> dict:
+    """Run requests through concurrency clients, return throughput and latency stats"""
+    latencies: List[float] = []
+    errors = 0
+    next_request = 0
+
+    async def client() -> None:
+        nonlocal errors, next_request
+        while next_request < requests:
+            i = next_request
+            next_request += 1
+            start = time.perf_counter()
+            status, _ = await send(driver, i)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "rps": round(requests / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def prepare_environment(data_dir: str) -> None:
+    """Point every storage path at data_dir, before config is imported"""
+    for name, file_name in (("DATA_FILE", "users.json"), ("SHARD_DIR", "users"),
+                            ("SQLITE_PATH", "users.db"), ("SNAPSHOT_PATH", "users.snapshot.json"),
+                            ("JOURNAL_PATH", "users.journal"), ("LOCK_FILE", ".users.lock"),
+                            ("CHANGES_FILE", ".users.changes")):
+        os.environ[name] = os.path.join(data_dir, file_name)
+    # The benchmark is one client address sending far more than any user would
+    os.environ.setdefault("API_RATE_LIMIT", "0")
+    os.environ.setdefault("CLIENT_RATE_LIMIT", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["MQTT_HOST"] = ""
+    os.environ["BOT_TOKEN"] = BOT_TOKEN
+
+async def run(args, scenarios: List[str]) -> dict:
+    from config import config
+    from webapp.app import app
+
+    driver = ASGIDriver(app)
+    await driver.startup()
+    all_scenarios = make_scenarios(lesson_answers(config.lessons_dir))
+    results = {}
+    try:
+        for name in scenarios:
+            send = all_scenarios[name]
+            # Warm up caches and lazily loaded lessons outside the measurement
+            for i in range(min(args.warmup, args.requests)):
+                await send(driver, i)
+            results[name] = await run_scenario(driver, send, args.requests, args.concurrency)
+    finally:
+        await driver.shutdown()
+    return {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "storage_mode": config.storage_mode,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "scenarios": results,
+    }
+
+SCENARIOS = ("lesson_page", "submit_quiz", "complete", "check_completion")
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the webapp")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=50, help="unmeasured requests before each scenario")
+    parser.add_argument("--scenario", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--output", default="bench-webapp.json", help="JSON report path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        prepare_environment(data_dir)
+        report = asyncio.run(run(args, args.scenario))
+
+    print(f"{'scenario':<18} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'errors':>7}")
+    for name, stats in report["scenarios"].items():
+        print(f"{name:<18} {stats['rps']:>9.1f} {stats['p50_ms']:>7.2f}ms "
+              f"{stats['p95_ms']:>7.2f}ms {stats['p99_ms']:>7.2f}ms {stats['errors']:>7}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}")
+    if any(stats["errors"] for stats in report["scenarios"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
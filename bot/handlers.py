@@ -1,11 +1,12 @@
 import asyncio
+import logging
 
 import aiohttp
-from aiogram import Router, F
+from aiogram import Bot, Router, F
 from aiogram.filters import CommandStart
 from aiogram.types import Message, CallbackQuery, LabeledPrice, PreCheckoutQuery, WebAppData
 from aiogram.types.input_media import InputMedia
-from data_manager import data_manager
+from data_manager import data_manager, default_user, grant_achievement, mark_lesson_completed
 from bot.keyboards import *
 import random
 
@@ -22,21 +23,7 @@ MEDITATION_IMAGES = [
 async def start_handler(message: Message):
     """Handle /start command"""
     user_id = str(message.from_user.id)
-    await data_manager.update_user(user_id,
-                                   {
-                                       "user_id": user_id,
-                                       "current_lesson": 0,
-                                       "completed_lessons": [],
-                                       "achievements": [],
-                                       "total_time": 0,
-                                       "last_activity": None,
-                                       "meditation_streak": 0,
-                                       "coins": 0,
-                                       "gifts_received": [],
-                                       "quiz_scores": {},
-                                       "payment_status": "free"
-                                   }
-                                   )
+    await data_manager.update_user(user_id, default_user(user_id))
     user_data = await data_manager.get_user(user_id)
     
     welcome_text = f"""
@@ -373,34 +360,9 @@ async def back_to_start_handler(callback: CallbackQuery):
         parse_mode="Markdown"
     )
 
-@router.callback_query(F.data == "check_lesson_completion")
-async def check_lesson_completion_handler(callback: CallbackQuery):
-    user_id = str(callback.from_user.id)
-
-    try:
-        from config import config
-
-        async with aiohttp.ClientSession() as session:
-            for lesson_id in [1, 2]:
-                async with session.get(
-                    f"{config.webapp_url}/api/lesson/{lesson_id}/check_completion",
-                    params={"user_id": user_id}
-                ) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get("completed"):
-                            score = data.get("score", 0)
-                            await data_manager.complete_lesson(user_id, lesson_id, score)
-
-                        # Add achievement
-                        if lesson_id == 1:
-                            await data_manager.add_achievement(user_id, "first_lesson")
-                        elif lesson_id == 2:
-                            await data_manager.add_achievement(user_id, "quiz_master")
-
-                        # Send congratulations
-                        percentage = data.get("percentage", 0)
-                        congratulations = f"""
+def lesson_congratulations(lesson_id: int, score: float, percentage: float) -> str:
+    """Text congratulating on a completed lesson and offering a gift"""
+    return f"""
 🎉 **Поздравляю с завершением урока {lesson_id}!**
 
 Отличный результат: {score} правильных ответов ({percentage:.0f}%)!
@@ -418,15 +380,81 @@ async def check_lesson_completion_handler(callback: CallbackQuery):
 Выбери один из трех подарков:
 """
 
-                        await callback.message.answer(
-                            text=congratulations,
-                            reply_markup=get_gift_selection_keyboard(),
-                            parse_mode="Markdown"
-                        )
-                        return
+LESSON_ACHIEVEMENTS = {1: "first_lesson", 2: "quiz_master"}
+
+async def complete_lesson_once(user_id: str, lesson_id: int, score: float) -> bool:
+    """Mark a lesson completed with its achievement, True if it was not completed before
+
+    The event and the button both lead here, only the first of them rewards the lesson.
+    """
+    async with data_manager.transaction(user_id) as user_data:
+        first_completion = lesson_id not in user_data.get("completed_lessons", [])
+        mark_lesson_completed(user_data, lesson_id, score)
+        if lesson_id in LESSON_ACHIEVEMENTS:
+            grant_achievement(user_data, LESSON_ACHIEVEMENTS[lesson_id])
+    return first_completion
+
+async def reward_lesson_completion(bot: Bot, event: dict) -> None:
+    """Reward a lesson completed in the WebApp as soon as its event arrives
+
+    Events are delivered at least once, so a lesson already recorded as
+    completed is not rewarded again.
+    """
+    if event.get("type") != "lesson_completed":
+        return
+    user_id = str(event["user_id"])
+    lesson_id = int(event["lesson_id"])
+    score = event.get("score", 0)
+
+    if not await complete_lesson_once(user_id, lesson_id, score):
+        return
+
+    await bot.send_message(
+        chat_id=int(user_id),
+        text=lesson_congratulations(lesson_id, score, event.get("percentage", 0)),
+        reply_markup=get_gift_selection_keyboard(),
+        parse_mode="Markdown"
+    )
+
+@router.callback_query(F.data == "check_lesson_completion")
+async def check_lesson_completion_handler(callback: CallbackQuery):
+    user_id = str(callback.from_user.id)
+
+    try:
+        from config import config
 
-        await callback.answer("Пока нет завершенных уроков. Пройдите урок в WebApp сначала!", show_alert=True)
+        already_rewarded = False
+        async with aiohttp.ClientSession() as session:
+            for lesson_id in [1, 2]:
+                async with session.get(
+                    f"{config.webapp_url}/api/lesson/{lesson_id}/check_completion",
+                    params={"user_id": user_id}
+                ) as response:
+                    if response.status != 200:
+                        continue
+                    data = await response.json()
+                if not data.get("completed"):
+                    continue
+                score = data.get("score", 0)
+                # Already rewarded through the completion event or an earlier press
+                if not await complete_lesson_once(user_id, lesson_id, score):
+                    already_rewarded = True
+                    continue
+
+                # Send congratulations
+                percentage = data.get("percentage", 0)
+                await callback.message.answer(
+                    text=lesson_congratulations(lesson_id, score, percentage),
+                    reply_markup=get_gift_selection_keyboard(),
+                    parse_mode="Markdown"
+                )
+                return
+
+        if already_rewarded:
+            await callback.answer("Награда за пройденные уроки уже получена!", show_alert=True)
+        else:
+            await callback.answer("Пока нет завершенных уроков. Пройдите урок в WebApp сначала!", show_alert=True)
 
     except SystemError as e:
-        print(f"Error checking lesson completion: {e}")
+        logging.error(f"Error checking lesson completion: {e}")
         await callback.answer("Ошибка проверки завершения урока", show_alert=True)
\ No newline at end of file
@@ -69,10 +69,9 @@ async def gift_selection_handler(callback: CallbackQuery):
     gift = GIFTS[gift_id]
     
     # Add gift to user data and coins
-    await data_manager.add_coins(user_id, gift["coins"])
-    user_data = await data_manager.get_user(user_id)
-    user_data.setdefault("gifts_received", []).append(gift_id)
-    await data_manager.update_user(user_id, user_data)
+    async with data_manager.transaction(user_id) as user_data:
+        user_data["coins"] = user_data.get("coins", 0) + gift["coins"]
+        user_data.setdefault("gifts_received", []).append(gift_id)
     
     gift_text = f"""
 🎁 **Отличный выбор!**
@@ -82,7 +81,7 @@ async def gift_selection_handler(callback: CallbackQuery):
 {gift["description"]}
 
 💰 **+{gift["coins"]} медитативных монет**
-🪙 **Всего монет:** {user_data.get('coins', 0) + gift["coins"]}
+🪙 **Всего монет:** {user_data["coins"]}
 
 ✨ Подарки помогут тебе глубже погрузиться в практику медитации и получить максимум пользы!
 
@@ -0,0 +1,34 @@
+from typing import Any, Awaitable, Callable, Dict
+import time
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from metrics import registry
+
+HANDLER_SECONDS = registry.histogram(
+    "bot_handler_duration_seconds", "Duration of bot update handlers", ("event", "handler", "result")
+)
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """Time every handler that matched an update
+
+    Registered as an inner middleware of the dispatcher, it also wraps
+    the handlers of included routers.
+    """
+
+    def __init__(self, event: str):
+        self.event = event
+
+    async def __call__(self, handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+                       event: TelegramObject, data: Dict[str, Any]) -> Any:
+        callback = getattr(data.get("handler"), "callback", None)
+        name = getattr(callback, "__name__", "unknown")
+        result = "error"
+        start = time.perf_counter()
+        try:
+            response = await handler(event, data)
+            result = "ok"
+            return response
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - start, self.event, name, result)
@@ -1,7 +1,7 @@
 from aiogram import Router, F
 from aiogram.types import CallbackQuery, LabeledPrice, PreCheckoutQuery, Message
 from aiogram.types.input_media import InputMedia
-from data_manager import data_manager
+from data_manager import data_manager, grant_achievement
 from bot.keyboards import get_back_keyboard
 import random
 
@@ -104,9 +104,10 @@ async def successful_payment_handler(message: Message):
     payment = message.successful_payment
     
     # Update user payment status
-    await data_manager.update_user(user_id, {"payment_status": "paid"})
-    await data_manager.add_achievement(user_id, "course_complete")
-    await data_manager.add_coins(user_id, 500)  # Bonus coins
+    async with data_manager.transaction(user_id) as user_data:
+        user_data["payment_status"] = "paid"
+        grant_achievement(user_data, "course_complete")
+        user_data["coins"] = user_data.get("coins", 0) + 500  # Bonus coins
     
     success_images = [
         "https://images.unsplash.com/photo-1506905925346-21bda4d32df4?w=800",
@@ -0,0 +1,79 @@
+from urllib.parse import urlsplit
+import asyncio
+import contextlib
+import hashlib
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import Config
+
+def webhook_path(cfg: Config) -> str:
+    """Local path of the webhook, the path part of WEBHOOK_URL"""
+    return urlsplit(cfg.webhook_url).path or "/"
+
+def webhook_secret(cfg: Config) -> str:
+    """Token Telegram sends with every update, derived from the bot token unless set"""
+    return cfg.webhook_secret or hashlib.sha256(cfg.bot_token.encode()).hexdigest()
+
+async def drain_updates(handler: SimpleRequestHandler, timeout: float) -> None:
+    """Wait for updates being handled in background, cancel what is left after timeout"""
+    # aiogram keeps no public handle on these tasks
+    tasks = set(handler._background_feed_update_tasks)
+    if not tasks:
+        return
+    logging.info(f"Waiting for {len(tasks)} updates to be handled")
+    _, pending = await asyncio.wait(tasks, timeout=timeout)
+    if pending:
+        logging.warning(f"{len(pending)} updates not handled in {timeout}s, cancelling")
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending)
+
+async def run_webhook(bot: Bot, dp: Dispatcher, cfg: Config) -> None:
+    """Serve updates Telegram pushes to WEBHOOK_URL until SIGINT or SIGTERM
+
+    Requests without the secret token get 401. Each update is answered at
+    once and handled in a background task, so a slow handler does not
+    hold back the next updates. On shutdown updates already taken get up
+    to WEBHOOK_DRAIN_TIMEOUT seconds to finish before the bot session closes.
+    """
+    app = web.Application()
+    handler = SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=webhook_secret(cfg),
+        handle_in_background=True
+    )
+    handler.register(app, path=webhook_path(cfg))
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, cfg.webhook_listen_host, cfg.webhook_listen_port)
+    try:
+        await site.start()
+        await bot.set_webhook(
+            cfg.webhook_url,
+            secret_token=webhook_secret(cfg),
+            allowed_updates=dp.resolve_used_update_types(),
+            max_connections=cfg.webhook_max_connections
+        )
+        logging.info(f"Webhook set to {cfg.webhook_url}, listening on port {cfg.webhook_listen_port}")
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stop.set)
+        await stop.wait()
+    finally:
+        # Stop taking updates, then let the ones already answered finish
+        await site.stop()
+        await drain_updates(handler, cfg.webhook_drain_timeout)
+        # Closes the bot session, the webhook stays set so Telegram keeps
+        # updates until the bot is back
+        await runner.cleanup()
@@ -11,8 +11,56 @@ class Config:
     bot_token: str
     webapp_url: str
     webhook_url: Optional[str] = None
+    webhook_secret: str = ""
+    webhook_listen_host: str = "0.0.0.0"
+    webhook_listen_port: int = 8081
+    webhook_max_connections: int = 40
+    webhook_drain_timeout: float = 10.0
     webapp_port: int = 8000
+    webapp_workers: int = 1
+    webapp_auth: bool = True
+    init_data_max_age: float = 86400.0
+    dev_mode: bool = False
     data_file: str = "data/users.json"
+    user_cache_size: int = 1024
+    storage_mode: str = "json"
+    serializer: str = ""
+    shard_dir: str = "data/users"
+    shard_count: int = 256
+    sqlite_path: str = "data/users.db"
+    snapshot_path: str = "data/users.snapshot.json"
+    journal_path: str = "data/users.journal"
+    journal_compact_after: int = 10000
+    write_behind: bool = False
+    flush_interval: float = 1.0
+    flush_max_dirty: int = 100
+    shared_data: bool = True
+    lock_file: str = "data/.users.lock"
+    changes_file: str = "data/.users.changes"
+    change_poll_interval: float = 0.0
+    lessons_dir: str = "content/lessons"
+    lesson_cache_size: int = 32
+    lesson_check_interval: float = 1.0
+    status_cache_ttl: float = 5.0
+    status_cache_size: int = 10000
+    api_rate_limit: float = 200.0
+    api_rate_burst: int = 400
+    client_rate_limit: float = 5.0
+    client_rate_burst: int = 20
+    forwarded_allow_ips: str = "127.0.0.1"
+    api_max_in_flight: int = 64
+    metrics_host: str = "127.0.0.1"
+    bot_metrics_port: int = 9101
+    mqtt_host: str = ""
+    mqtt_port: int = 1883
+    mqtt_topic: str = "demo_course/lesson_completed"
+    mqtt_client_id: str = "demo_course_bot"
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_sampling: str = ""
+    log_rate_limit: float = 20.0
+    log_rate_burst: int = 50
+    log_queue_size: int = 10000
     
     @classmethod
     def from_env(cls):
@@ -20,7 +68,56 @@ class Config:
             bot_token=os.getenv("BOT_TOKEN", ""),
             webapp_url=os.getenv("WEBAPP_URL", "http://localhost:8080"),
             webhook_url=os.getenv("WEBHOOK_URL"),
+            webhook_secret=os.getenv("WEBHOOK_SECRET", ""),
+            webhook_listen_host=os.getenv("WEBHOOK_LISTEN_HOST", "0.0.0.0"),
+            webhook_listen_port=int(os.getenv("WEBHOOK_LISTEN_PORT", "8081")),
+            webhook_max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")),
+            webhook_drain_timeout=float(os.getenv("WEBHOOK_DRAIN_TIMEOUT", "10")),
             webapp_port=int(os.getenv("WEBAPP_PORT", "8000")),
+            webapp_workers=int(os.getenv("WEBAPP_WORKERS", "1")),
+            webapp_auth=os.getenv("WEBAPP_AUTH", "1").lower() in ("1", "true", "yes"),
+            init_data_max_age=float(os.getenv("INIT_DATA_MAX_AGE", "86400")),
+            dev_mode=os.getenv("DEV_MODE", "0").lower() in ("1", "true", "yes"),
+            data_file=os.getenv("DATA_FILE", "data/users.json"),
+            user_cache_size=int(os.getenv("USER_CACHE_SIZE", "1024")),
+            storage_mode=os.getenv("STORAGE_MODE", "json"),
+            serializer=os.getenv("SERIALIZER", ""),
+            shard_dir=os.getenv("SHARD_DIR", "data/users"),
+            shard_count=int(os.getenv("SHARD_COUNT", "256")),
+            sqlite_path=os.getenv("SQLITE_PATH", "data/users.db"),
+            snapshot_path=os.getenv("SNAPSHOT_PATH", "data/users.snapshot.json"),
+            journal_path=os.getenv("JOURNAL_PATH", "data/users.journal"),
+            journal_compact_after=int(os.getenv("JOURNAL_COMPACT_AFTER", "10000")),
+            write_behind=os.getenv("WRITE_BEHIND", "0").lower() in ("1", "true", "yes"),
+            flush_interval=float(os.getenv("FLUSH_INTERVAL", "1.0")),
+            flush_max_dirty=int(os.getenv("FLUSH_MAX_DIRTY", "100")),
+            shared_data=os.getenv("SHARED_DATA", "1").lower() in ("1", "true", "yes"),
+            lock_file=os.getenv("LOCK_FILE", "data/.users.lock"),
+            changes_file=os.getenv("CHANGES_FILE", "data/.users.changes"),
+            change_poll_interval=float(os.getenv("CHANGE_POLL_INTERVAL", "0")),
+            lessons_dir=os.getenv("LESSONS_DIR", "content/lessons"),
+            lesson_cache_size=int(os.getenv("LESSON_CACHE_SIZE", "32")),
+            lesson_check_interval=float(os.getenv("LESSON_CHECK_INTERVAL", "1.0")),
+            status_cache_ttl=float(os.getenv("STATUS_CACHE_TTL", "5")),
+            status_cache_size=int(os.getenv("STATUS_CACHE_SIZE", "10000")),
+            api_rate_limit=float(os.getenv("API_RATE_LIMIT", "200")),
+            api_rate_burst=int(os.getenv("API_RATE_BURST", "400")),
+            client_rate_limit=float(os.getenv("CLIENT_RATE_LIMIT", "5")),
+            client_rate_burst=int(os.getenv("CLIENT_RATE_BURST", "20")),
+            forwarded_allow_ips=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+            api_max_in_flight=int(os.getenv("API_MAX_IN_FLIGHT", "64")),
+            metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+            bot_metrics_port=int(os.getenv("BOT_METRICS_PORT", "9101")),
+            mqtt_host=os.getenv("MQTT_HOST", ""),
+            mqtt_port=int(os.getenv("MQTT_PORT", "1883")),
+            mqtt_topic=os.getenv("MQTT_TOPIC", "demo_course/lesson_completed"),
+            mqtt_client_id=os.getenv("MQTT_CLIENT_ID", "demo_course_bot"),
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            log_format=os.getenv("LOG_FORMAT", "json"),
+            log_sampling=os.getenv("LOG_SAMPLING", ""),
+            log_rate_limit=float(os.getenv("LOG_RATE_LIMIT", "20")),
+            log_rate_burst=int(os.getenv("LOG_RATE_BURST", "50")),
+            log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
         )
 
 config = Config.from_env()
\ No newline at end of file
@@ -1,79 +1,490 @@
-import json
-import aiofiles
-from typing import Dict, Any, Optional
+from typing import Dict, Any, AsyncContextManager, AsyncIterator, Callable, Iterable, List, Optional, Set, Tuple
+from collections import OrderedDict
 from datetime import datetime
 import asyncio
+import contextlib
+import copy
+import logging
 import os
+import time
+import weakref
+
+from config import Config, config
+from metrics import registry
+from models import UserRecord
+from storage.base import StorageBackend
+from storage.coordination import ALL_USERS, ChangeFeed, FileLock
+from storage.indexes import UserIndexes
+from storage.journal_backend import JournalBackend
+from storage.json_backend import JsonFileBackend, ShardedJsonBackend
+from storage.serializers import get_serializer
+from storage.sqlite_backend import SQLiteBackend
+
+STORAGE_MODES = ("json", "sharded", "sqlite", "journal")
+
+# Backend calls by operation: get, put, put_many, load_all, save_all
+STORAGE_SECONDS = registry.histogram(
+    "storage_operation_seconds", "Duration of user storage operations", ("operation",)
+)
+
+def create_backend(cfg: Config) -> StorageBackend:
+    """Build the storage backend selected by STORAGE_MODE"""
+    # Empty SERIALIZER keeps each backend's own default format
+    serializer = get_serializer(cfg.serializer) if cfg.serializer else None
+    if cfg.storage_mode == "json":
+        return JsonFileBackend(cfg.data_file, serializer)
+    if cfg.storage_mode == "sharded":
+        return ShardedJsonBackend(cfg.shard_dir, cfg.shard_count, serializer)
+    if cfg.storage_mode == "sqlite":
+        return SQLiteBackend(cfg.sqlite_path)
+    if cfg.storage_mode == "journal":
+        return JournalBackend(cfg.snapshot_path, cfg.journal_path, cfg.journal_compact_after, serializer)
+    raise ValueError(f"Unknown storage mode: {cfg.storage_mode}")
+
+def storage_files(cfg: Config) -> List[str]:
+    """Files and directories the selected storage mode writes"""
+    if cfg.storage_mode == "sharded":
+        return [cfg.shard_dir]
+    if cfg.storage_mode == "sqlite":
+        return [cfg.sqlite_path, f"{cfg.sqlite_path}-wal"]
+    if cfg.storage_mode == "journal":
+        return [cfg.snapshot_path, cfg.journal_path]
+    return [cfg.data_file]
+
+def storage_file_sizes(cfg: Config) -> Dict[Tuple[str, ...], float]:
+    """Size in bytes of each existing storage file, directories summed up"""
+    sizes = {}
+    for path in storage_files(cfg):
+        try:
+            if os.path.isdir(path):
+                with os.scandir(path) as entries:
+                    sizes[(path,)] = sum(entry.stat().st_size for entry in entries if entry.is_file())
+            else:
+                sizes[(path,)] = os.path.getsize(path)
+        except OSError:
+            continue
+    return sizes
+
+def default_user(user_id: str) -> Dict[str, Any]:
+    """Get record of a user that has not been stored yet"""
+    return UserRecord.new(user_id).to_dict()
+
+def merge_changes(current: Dict[str, Any], base: Dict[str, Any], changed: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply the changes made from base to changed onto current, a newer copy of base
+
+    Nested dicts are merged key by key and lists as sets of added and
+    removed items (completed lessons, achievements, gifts), so changes to
+    different keys or items all survive. Other values take the changed one.
+    """
+    merged = dict(current)
+    for key in base.keys() | changed.keys():
+        if key not in changed:
+            merged.pop(key, None)
+            continue
+        old, new = base.get(key), changed[key]
+        if key in base and old == new:
+            continue
+        now = merged.get(key)
+        if isinstance(old, dict) and isinstance(new, dict) and isinstance(now, dict):
+            merged[key] = merge_changes(now, old, new)
+        elif isinstance(old, list) and isinstance(new, list) and isinstance(now, list):
+            merged[key] = [item for item in now if item in new or item not in old]
+            merged[key] += [item for item in new if item not in old and item not in merged[key]]
+        else:
+            merged[key] = new
+    return merged
+
+def mark_lesson_completed(user_data: Dict[str, Any], lesson_id: int, quiz_score: int) -> None:
+    """Record lesson completion and quiz score in a user record"""
+    completed_lessons = user_data.setdefault("completed_lessons", [])
+    if lesson_id not in completed_lessons:
+        completed_lessons.append(lesson_id)
+    user_data.setdefault("quiz_scores", {})[str(lesson_id)] = quiz_score
+    user_data["current_lesson"] = max(user_data.get("current_lesson", 0), lesson_id + 1)
+
+def record_lesson_result(user_data: Dict[str, Any], lesson_id: int, score: int, percentage: float) -> None:
+    """Record the webapp quiz result of a lesson in a user record"""
+    user_data.setdefault("lesson_results", {})[str(lesson_id)] = {
+        "score": score,
+        "percentage": percentage,
+        "completed_at": datetime.now().isoformat()
+    }
+
+def grant_achievement(user_data: Dict[str, Any], achievement: str) -> bool:
+    """Add achievement to a user record, return False if it was already there"""
+    achievements = user_data.setdefault("achievements", [])
+    if achievement in achievements:
+        return False
+    achievements.append(achievement)
+    return True
 
 class DataManager:
-    def __init__(self, file_path: str = "data/users.json"):
-        self.file_path = file_path
+    def __init__(self, file_path: str = "data/users.json", cache_size: int = 1024,
+                 backend: Optional[StorageBackend] = None, write_behind: bool = False,
+                 flush_interval: float = 1.0, flush_max_dirty: int = 100,
+                 shared_lock: Optional[FileLock] = None, change_feed: Optional[ChangeFeed] = None,
+                 change_poll_interval: float = 0.0):
+        self.backend = backend or JsonFileBackend(file_path)
         self._lock = asyncio.Lock()
-        
+        # Coordination with other processes writing to the same data volume
+        self.shared_lock = shared_lock
+        self.change_feed = change_feed
+        self.change_poll_interval = change_poll_interval
+        self._last_poll = 0.0
+        self._change_listeners: List[Callable[[Optional[str]], None]] = []
+        self._user_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+        # Write-through LRU cache of user records, most recently used last
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, UserRecord]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # Write-behind: changed records wait in memory and are flushed in batches
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_max_dirty = flush_max_dirty
+        self._dirty: Dict[str, UserRecord] = {}
+        self._flushing: Dict[str, UserRecord] = {}
+        self._flush_lock = asyncio.Lock()
+        self._flush_timer: Optional[asyncio.Task] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+        self.flush_count = 0
+        # Secondary indexes, built by the first query and then kept up to date
+        self._indexes: Optional[UserIndexes] = None
+        self._index_lock = asyncio.Lock()
+        self._index_building = False
+        self._index_generation = 0
+        self._index_stale: Set[str] = set()
+
     async def load_data(self) -> Dict[str, Any]:
-        """Load user data from JSON file"""
-        try:
-            async with aiofiles.open(self.file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                return json.loads(content) if content.strip() else {}
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
-    
+        """Load all user data from storage"""
+        with STORAGE_SECONDS.time("load_all"):
+            data = await self.backend.load_all()
+        for pending in (self._flushing, self._dirty):
+            data.update((user_id, record.to_dict()) for user_id, record in pending.items())
+        return data
+
     async def save_data(self, data: Dict[str, Any]) -> None:
-        """Save user data to JSON file"""
-        async with self._lock:
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            async with aiofiles.open(self.file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(data, ensure_ascii=False, indent=2))
-    
+        """Replace all user data in storage"""
+        async with self._lock, self._flush_lock, self._writer_lock():
+            self.sync_changes(force=True)
+            self._dirty.clear()
+            with STORAGE_SECONDS.time("save_all"):
+                await self.backend.save_all(data)
+            self._publish([ALL_USERS])
+            self.invalidate()
+            self._drop_indexes()
+
+    def _writer_lock(self) -> AsyncContextManager:
+        """Get the lock shared by all processes writing to storage"""
+        return self.shared_lock or contextlib.nullcontext()
+
+    def _publish(self, user_ids: Iterable[str]) -> None:
+        """Tell other processes which users changed, caller holds the writer lock"""
+        if self.change_feed is not None:
+            self.change_feed.publish(user_ids)
+
+    def add_change_listener(self, listener: Callable[[Optional[str]], None]) -> None:
+        """Call listener(user_id) when another process changes a user, None means everyone"""
+        self._change_listeners.append(listener)
+
+    def sync_changes(self, force: bool = False) -> None:
+        """Drop cached records that other processes changed since last check"""
+        if self.change_feed is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.change_poll_interval:
+            return
+        self._last_poll = now
+        changed = self.change_feed.poll()
+        if not changed:
+            return
+        if ALL_USERS in changed:
+            self.invalidate()
+            self.backend.invalidate(None)
+            self._drop_indexes()
+            for listener in self._change_listeners:
+                listener(None)
+            return
+        self.backend.invalidate(changed)
+        if self._indexes is not None or self._index_building:
+            self._index_stale.update(changed)
+        for user_id in changed:
+            self.invalidate(user_id)
+            for listener in self._change_listeners:
+                listener(user_id)
+
+    async def flush(self) -> None:
+        """Write all pending records to storage in one batch"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            self._flushing, self._dirty = self._dirty, {}
+            try:
+                async with self._writer_lock():
+                    self.sync_changes(force=True)
+                    with STORAGE_SECONDS.time("put_many"):
+                        await self.backend.put_many({
+                            user_id: record.to_dict() for user_id, record in self._flushing.items()
+                        })
+                    self._publish(self._flushing)
+                self.flush_count += 1
+            except Exception:
+                # Keep failed records pending, newer changes win
+                for user_id, record in self._flushing.items():
+                    self._dirty.setdefault(user_id, record)
+                raise
+            finally:
+                self._flushing = {}
+
+    def _schedule_flush(self) -> None:
+        """Flush now if too many records are pending, otherwise after the interval"""
+        if len(self._dirty) >= self.flush_max_dirty:
+            task = asyncio.create_task(self.flush())
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        elif self._flush_timer is None:
+            self._flush_timer = asyncio.create_task(self._flush_after_interval())
+
+    async def _flush_after_interval(self) -> None:
+        """Flush pending records once the interval has passed"""
+        try:
+            await asyncio.sleep(self.flush_interval)
+        finally:
+            self._flush_timer = None
+        try:
+            await self.flush()
+        except Exception:
+            logging.exception("Failed to flush user data, will retry")
+            if self._dirty:
+                self._schedule_flush()
+
+    async def close(self) -> None:
+        """Flush pending writes and close storage backend"""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush()
+        await self.backend.close()
+
+    def _cache_get(self, user_id: str) -> Optional[UserRecord]:
+        """Return cached user record and mark it as recently used"""
+        record = self._cache.get(user_id)
+        if record is None:
+            self.cache_misses += 1
+            return None
+        self.cache_hits += 1
+        self._cache.move_to_end(user_id)
+        return record
+
+    def _cache_put(self, user_id: str, record: UserRecord) -> None:
+        """Store user record in cache, evicting least recently used entries"""
+        if self.cache_size <= 0:
+            return
+        self._cache[user_id] = record
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _pending(self, user_id: str) -> Optional[UserRecord]:
+        """Get a record that is changed in memory but not yet in storage"""
+        return self._dirty.get(user_id) or self._flushing.get(user_id)
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user (or every user) from the cache"""
+        if user_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(str(user_id), None)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Get cache size and hit/miss counters"""
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "hit_rate": self.cache_hits / lookups if lookups else 0.0
+        }
+
+    def _drop_indexes(self) -> None:
+        """Forget the indexes, the next query rebuilds them"""
+        self._indexes = None
+        self._index_generation += 1
+        self._index_stale.clear()
+
+    def _index_user(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        """Reindex a committed record"""
+        if self._indexes is not None:
+            self._indexes.update(user_id, user_data)
+        elif self._index_building:
+            self._index_stale.add(user_id)
+
+    async def _get_indexes(self) -> UserIndexes:
+        """Get up to date indexes, building them with one full scan if needed"""
+        self.sync_changes()
+        async with self._index_lock:
+            while self._indexes is None:
+                # Commits and foreign changes during the scan are marked stale
+                generation = self._index_generation
+                self._index_building = True
+                try:
+                    data = await self.load_data()
+                finally:
+                    self._index_building = False
+                if generation != self._index_generation:
+                    # Storage was replaced during the scan, read it again
+                    continue
+                indexes = UserIndexes()
+                for user_id, user_data in data.items():
+                    indexes.update(user_id, user_data)
+                self._indexes = indexes
+            indexes = self._indexes
+            while self._index_stale:
+                stale, self._index_stale = self._index_stale, set()
+                for user_id in stale:
+                    indexes.update(user_id, await self._load_user(user_id))
+            return indexes
+
+    async def users_inactive_since(self, cutoff: datetime, include_never_active: bool = True) -> List[str]:
+        """Get users whose last activity is before cutoff, oldest first"""
+        return (await self._get_indexes()).inactive_since(cutoff, include_never_active)
+
+    async def users_with_payment_status(self, status: str) -> Set[str]:
+        """Get users with the given payment status"""
+        return (await self._get_indexes()).payment_status.get(status)
+
+    async def users_at_lesson(self, lesson_id: int) -> Set[str]:
+        """Get users whose current lesson is lesson_id"""
+        return (await self._get_indexes()).current_lesson.get(lesson_id)
+
+    async def users_with_streak(self, min_streak: int, max_streak: Optional[int] = None) -> List[str]:
+        """Get users with meditation streak in [min_streak, max_streak], shortest first"""
+        return (await self._get_indexes()).meditation_streak.between(min_streak, max_streak)
+
+    async def _load_user(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get a fresh copy of the current record from memory or storage"""
+        record = self._pending(user_id) or self._cache_get(user_id)
+        if record is not None:
+            return record.to_dict()
+        with STORAGE_SECONDS.time("get"):
+            user_data = await self.backend.get(user_id)
+        if user_data is not None:
+            self._cache_put(user_id, UserRecord.from_dict(user_data))
+        return user_data
+
+    def _user_lock(self, user_id: str) -> asyncio.Lock:
+        """Get the lock serializing writes of one user"""
+        lock = self._user_locks.get(user_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._user_locks[user_id] = lock
+        return lock
+
     async def get_user(self, user_id: str) -> Dict[str, Any]:
         """Get user data"""
-        data = await self.load_data()
-        return data.get(str(user_id), {
-            "user_id": user_id,
-            "current_lesson": 0,
-            "completed_lessons": [],
-            "achievements": [],
-            "total_time": 0,
-            "last_activity": None,
-            "meditation_streak": 0,
-            "coins": 0,
-            "gifts_received": [],
-            "quiz_scores": {},
-            "payment_status": "free"
-        })
-    
+        self.sync_changes()
+        user_data = await self._load_user(str(user_id))
+        if user_data is not None:
+            return user_data
+        return default_user(user_id)
+
+    @contextlib.asynccontextmanager
+    async def transaction(self, user_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Load a user once, let the caller mutate it and commit once
+
+        Writes of the same user are serialized by a per-user lock, so
+        concurrent read-modify-write sequences in this process cannot lose
+        updates, while transactions of different users run side by side.
+        The record is only stored if the block exits without an exception
+        and actually changed it.
+
+        With a shared lock configured only the commit holds it: the record
+        is read again, and if another process changed it meanwhile the
+        block's changes are merged into that version (see merge_changes).
+        Two processes setting the same value at once, last commit wins.
+        Do not call other DataManager methods of the same user inside the
+        block, the per-user lock is not reentrant.
+        """
+        user_id = str(user_id)
+        async with self._user_lock(user_id):
+            self.sync_changes(force=True)
+            stored = await self._load_user(user_id)
+            user_data = copy.deepcopy(stored) if stored is not None else default_user(user_id)
+            base = stored if stored is not None else copy.deepcopy(user_data)
+            yield user_data
+            if user_data == stored:
+                return
+            async with self._writer_lock():
+                self.sync_changes(force=True)
+                current = await self._load_user(user_id)
+                if current is not None and current != stored:
+                    user_data = merge_changes(current, base, user_data)
+                user_data["last_activity"] = datetime.now().isoformat()
+                record = UserRecord.from_dict(user_data)
+                if self.write_behind:
+                    # Published to other processes when the flush reaches storage
+                    self._dirty[user_id] = record
+                    self._schedule_flush()
+                else:
+                    with STORAGE_SECONDS.time("put"):
+                        await self.backend.put(user_id, user_data)
+                    self._publish([user_id])
+                self._cache_put(user_id, record)
+                self._index_user(user_id, user_data)
+
     async def update_user(self, user_id: str, updates: Dict[str, Any]) -> None:
         """Update user data"""
-        data = await self.load_data()
-        user_data = data.get(str(user_id), {})
-        user_data.update(updates)
-        user_data["last_activity"] = datetime.now().isoformat()
-        data[str(user_id)] = user_data
-        await self.save_data(data)
-    
+        async with self.transaction(user_id) as user_data:
+            user_data.update(copy.deepcopy(updates))
+
     async def complete_lesson(self, user_id: str, lesson_id: int, quiz_score: int) -> None:
         """Mark lesson as completed"""
-        user_data = await self.get_user(user_id)
-        if lesson_id not in user_data["completed_lessons"]:
-            user_data["completed_lessons"].append(lesson_id)
-        user_data["quiz_scores"][str(lesson_id)] = quiz_score
-        user_data["current_lesson"] = max(user_data["current_lesson"], lesson_id + 1)
-        await self.update_user(user_id, user_data)
-    
+        async with self.transaction(user_id) as user_data:
+            mark_lesson_completed(user_data, lesson_id, quiz_score)
+
     async def add_achievement(self, user_id: str, achievement: str) -> bool:
         """Add achievement to user"""
+        async with self.transaction(user_id) as user_data:
+            return grant_achievement(user_data, achievement)
+
+    async def save_lesson_result(self, user_id: str, lesson_id: int, score: int, percentage: float) -> None:
+        """Store the webapp quiz result of a lesson"""
+        async with self.transaction(user_id) as user_data:
+            record_lesson_result(user_data, lesson_id, score, percentage)
+
+    async def get_lesson_result(self, user_id: str, lesson_id: int) -> Optional[Dict[str, Any]]:
+        """Get the stored webapp quiz result of a lesson, None if not completed"""
         user_data = await self.get_user(user_id)
-        if achievement not in user_data["achievements"]:
-            user_data["achievements"].append(achievement)
-            await self.update_user(user_id, user_data)
-            return True
-        return False
-    
-    async def add_coins(self, user_id: str, amount: int) -> None:
-        """Add coins to user balance"""
-        user_data = await self.get_user(user_id)
-        user_data["coins"] += amount
-        await self.update_user(user_id, user_data)
+        return user_data.get("lesson_results", {}).get(str(lesson_id))
+
+    async def add_coins(self, user_id: str, amount: int) -> int:
+        """Add coins to user balance, return new balance"""
+        async with self.transaction(user_id) as user_data:
+            user_data["coins"] = user_data.get("coins", 0) + amount
+            return user_data["coins"]
+
+data_manager = DataManager(
+    cache_size=config.user_cache_size,
+    backend=create_backend(config),
+    write_behind=config.write_behind,
+    flush_interval=config.flush_interval,
+    flush_max_dirty=config.flush_max_dirty,
+    shared_lock=FileLock(config.lock_file) if config.shared_data else None,
+    change_feed=ChangeFeed(config.changes_file) if config.shared_data else None,
+    change_poll_interval=config.change_poll_interval
+)
 
-data_manager = DataManager()
\ No newline at end of file
+# Read on every scrape from numbers DataManager already keeps
+registry.counter("user_cache_hits_total", "User cache hits",
+                 collect=lambda: {(): data_manager.cache_hits})
+registry.counter("user_cache_misses_total", "User cache misses",
+                 collect=lambda: {(): data_manager.cache_misses})
+registry.gauge("user_cache_entries", "Users held in the cache",
+               collect=lambda: {(): len(data_manager._cache)})
+registry.gauge("user_writes_pending", "Changed users waiting for a write-behind flush",
+               collect=lambda: {(): len(data_manager._dirty)})
+registry.gauge("storage_file_bytes", "Size of user storage files", ("path",),
+               collect=lambda: storage_file_sizes(config))
@@ -0,0 +1,117 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+from datetime import datetime
+import asyncio
+import json
+import logging
+
+from config import Config
+
+# Seconds between reconnect attempts while the broker is unreachable
+RECONNECT_DELAY = 5.0
+
+def completion_event(user_id: str, lesson_id: int, score: float, percentage: float) -> Dict[str, Any]:
+    return {
+        "type": "lesson_completed",
+        "user_id": str(user_id),
+        "lesson_id": lesson_id,
+        "score": score,
+        "percentage": percentage,
+        "completed_at": datetime.now().isoformat()
+    }
+
+class EventPublisher:
+    """Publishes events to the MQTT broker from a background task
+
+    publish() only queues the event, so request handlers never wait on the
+    broker. While the broker is down events wait in a bounded queue, the
+    oldest are dropped when it fills up. With no MQTT_HOST configured
+    publishing is a no-op.
+    """
+
+    def __init__(self, cfg: Config, max_queued: int = 1000):
+        self.host = cfg.mqtt_host
+        self.port = cfg.mqtt_port
+        self.topic = cfg.mqtt_topic
+        self._queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize=max_queued)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.host)
+
+    def start(self) -> None:
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        if self._queue.full():
+            self._queue.get_nowait()
+            logging.warning("Event queue full, dropped the oldest event")
+        self._queue.put_nowait(json.dumps(event, ensure_ascii=False).encode('utf-8'))
+
+    async def _run(self) -> None:
+        # Imported only when MQTT is configured, the broker is optional
+        from asyncio_mqtt import Client, MqttError
+        payload = None
+        while True:
+            try:
+                async with Client(self.host, self.port) as client:
+                    while True:
+                        if payload is None:
+                            payload = await self._queue.get()
+                        await client.publish(self.topic, payload, qos=1)
+                        payload = None
+            except MqttError as e:
+                # The unsent payload is kept and retried after reconnecting
+                logging.warning(f"MQTT publisher disconnected: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+
+    async def close(self, timeout: float = 2.0) -> None:
+        """Give queued events a moment to go out, then stop"""
+        if self._task is None:
+            return
+        try:
+            await asyncio.wait_for(self._drained(), timeout)
+        except asyncio.TimeoutError:
+            logging.warning(f"{self._queue.qsize()} events not published on shutdown")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _drained(self) -> None:
+        while not self._queue.empty():
+            await asyncio.sleep(0.05)
+
+async def consume_events(cfg: Config, handler: Callable[[Dict[str, Any]], Awaitable[None]]) -> None:
+    """Pass every event from the broker to handler, reconnecting forever
+
+    The persistent session (fixed client id, clean_session=False) and QoS 1
+    make the broker keep events that arrive while the consumer is down.
+    Delivery is at least once, handlers must tolerate duplicates.
+    """
+    from asyncio_mqtt import Client, MqttError
+    while True:
+        client = Client(cfg.mqtt_host, cfg.mqtt_port, client_id=cfg.mqtt_client_id, clean_session=False)
+        try:
+            # The filter goes in before connecting: the broker replays events
+            # queued for the session right after CONNACK, a filter added later
+            # would miss them
+            async with client.filtered_messages(cfg.mqtt_topic) as messages:
+                async with client:
+                    await client.subscribe(cfg.mqtt_topic, qos=1)
+                    logging.info(f"Subscribed to {cfg.mqtt_topic}")
+                    async for message in messages:
+                        try:
+                            event = json.loads(message.payload)
+                        except ValueError:
+                            logging.warning("Skipping malformed event")
+                            continue
+                        try:
+                            await handler(event)
+                        except Exception:
+                            logging.exception(f"Failed to handle event {event.get('type')}")
+        except MqttError as e:
+            logging.warning(f"MQTT consumer disconnected: {e}")
+            await asyncio.sleep(RECONNECT_DELAY)
@@ -0,0 +1,167 @@
+from typing import Dict, Optional, Tuple
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from config import Config
+
+# Attributes every LogRecord has, anything else came in through extra={...}
+RECORD_ATTRS = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, extra={...} fields included"""
+
+    def __init__(self, service: str):
+        super().__init__()
+        self.service = service
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "service": self.service,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        for name, value in record.__dict__.items():
+            if name not in RECORD_ATTRS:
+                entry[name] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class SamplingFilter(logging.Filter):
+    """Pass only a share of records per level, e.g. {logging.DEBUG: 0.1}"""
+
+    def __init__(self, rates: Dict[int, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = self.rates.get(record.levelno, 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site, so one noisy line cannot flood the log
+
+    Records at or above exempt_level always pass. The next record let
+    through from a throttled call site carries the number dropped meanwhile.
+    """
+
+    def __init__(self, rate: float, burst: int, exempt_level: int = logging.ERROR):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.exempt_level = exempt_level
+        # (pathname, lineno) -> [tokens, last refill, suppressed]
+        self._buckets: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.exempt_level:
+            return True
+        now = time.monotonic()
+        key = (record.pathname, record.lineno)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = [float(self.burst), now, 0]
+            tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if tokens < 1:
+                bucket[0] = tokens
+                bucket[2] += 1
+                return False
+            bucket[0] = tokens - 1
+            if bucket[2]:
+                record.suppressed = bucket[2]
+                bucket[2] = 0
+        return True
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records instead of waiting when the queue is full"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Render message and traceback now, the args may change before the listener runs
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def parse_sampling(spec: str) -> Dict[int, float]:
+    """Parse "DEBUG=0.1,INFO=0.5" into {level: rate}"""
+    rates = {}
+    for item in spec.split(","):
+        name, _, rate = item.partition("=")
+        if name.strip() and rate.strip():
+            rates[logging.getLevelName(name.strip().upper())] = float(rate)
+    return rates
+
+def setup_logging(service: str, cfg: Config) -> None:
+    """Route all logging of this process through the background writer
+
+    Records are sampled, rate limited and queued in the calling thread,
+    formatting and writing to stdout happen on the listener thread, so a
+    log call never waits on I/O.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    if cfg.log_format == "json":
+        formatter = JsonFormatter(service)
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=cfg.log_queue_size)
+    handler = NonBlockingQueueHandler(log_queue)
+    if cfg.log_sampling:
+        handler.addFilter(SamplingFilter(parse_sampling(cfg.log_sampling)))
+    if cfg.log_rate_limit > 0:
+        handler.addFilter(RateLimitFilter(cfg.log_rate_limit, cfg.log_rate_burst))
+
+    root = logging.getLogger()
+    for old in root.handlers[:]:
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(cfg.log_level.upper())
+
+    _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the background writer"""
+    global _listener
+    if _listener is not None:
+        try:
+            _listener.stop()
+        except queue.Full:
+            # No room for the stop sentinel, the daemon writer dies with the process
+            pass
+        _listener = None
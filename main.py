@@ -5,15 +5,18 @@ from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 
 from config import config
+from data_manager import data_manager
+from events import consume_events
+from logging_setup import setup_logging, shutdown_logging
+from metrics import start_metrics_server
 from bot import handlers, lesson_handlers, payment_handlers
+from bot.middlewares import HandlerMetricsMiddleware
+from bot.webhook import run_webhook
 
 async def main():
     """Main bot function"""
     # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
+    setup_logging("bot", config)
     
     # Check bot token
     if not config.bot_token:
@@ -32,10 +35,38 @@ async def main():
     dp.include_router(handlers.router)
     dp.include_router(lesson_handlers.router) 
     dp.include_router(payment_handlers.router)
+
+    # Handler latency, served with storage metrics on BOT_METRICS_PORT
+    for event in ("message", "callback_query", "pre_checkout_query"):
+        dp.observers[event].middleware(HandlerMetricsMiddleware(event))
+    metrics_runner = None
+    if config.bot_metrics_port:
+        metrics_runner = await start_metrics_server(config.metrics_host, config.bot_metrics_port)
     
-    # Start polling
+    # Rewards for lessons completed in the WebApp arrive as MQTT events
+    events_task = None
+    if config.mqtt_host:
+        events_task = asyncio.create_task(
+            consume_events(config, lambda event: handlers.reward_lesson_completion(bot, event))
+        )
+
     logging.info("Bot starting...")
-    await dp.start_polling(bot)
+    try:
+        if config.webhook_url:
+            await run_webhook(bot, dp, config)
+        else:
+            # A webhook left from webhook mode would make getUpdates fail
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    finally:
+        if events_task is not None:
+            events_task.cancel()
+            await asyncio.gather(events_task, return_exceptions=True)
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        # Persist writes still waiting in the write-behind queue
+        await data_manager.close()
+        shutdown_logging()
 
 if __name__ == "__main__":
     try:
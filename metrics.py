@@ -0,0 +1,207 @@
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import contextlib
+import math
+import time
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a cached read to a full rewrite of a large users.json
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+def _sample(name: str, labelnames: Sequence[str], labels: Labels, value: float) -> str:
+    if not labelnames:
+        return f"{name} {_format_value(value)}"
+    pairs = ",".join(f'{key}="{_escape(str(val))}"' for key, val in zip(labelnames, labels))
+    return f"{name}{{{pairs}}} {_format_value(value)}"
+
+class Metric:
+    """A named metric with fixed label names, label values are given positionally
+
+    collect, if given, is called on every scrape and returns the current
+    values by label values, for numbers kept elsewhere (cache counters,
+    file sizes).
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable[[], Dict[Labels, float]]] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+        self._values: Dict[Labels, float] = {}
+
+    def _labels(self, labels: Sequence[str]) -> Labels:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self) -> List[str]:
+        values = self.collect() if self.collect is not None else self._values
+        return [_sample(self.name, self.labelnames, labels, value) for labels, value in values.items()]
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        key = self._labels(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, *labels: str) -> None:
+        self._values[self._labels(labels)] = value
+
+class Histogram(Metric):
+    """Cumulative buckets, sum and count per label values"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket (not cumulative) + overflow, sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        key = self._labels(labels)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+        counts = series[0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+        series[1] += value
+
+    @contextlib.contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        """Observe the duration of the block, also when it raises"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def samples(self) -> List[str]:
+        lines = []
+        bucket_labelnames = self.labelnames + ("le",)
+        for labels, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(_sample(f"{self.name}_bucket", bucket_labelnames,
+                                     labels + (_format_value(bound),), cumulative))
+            lines.append(_sample(f"{self.name}_sum", self.labelnames, labels, total))
+            lines.append(_sample(f"{self.name}_count", self.labelnames, labels, cumulative))
+        return lines
+
+class Registry:
+    """Metrics of one process, rendered for Prometheus
+
+    Metrics are created where they are measured, asking twice for the same
+    name returns the same metric. Every process (bot, each webapp worker)
+    has its own values.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is already registered as a {metric.type}")
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = (),
+                collect: Optional[Callable[[], Dict[Labels, float]]] = None) -> Counter:
+        return self._get_or_create(Counter, name, help, labelnames, collect)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable[[], Dict[Labels, float]]] = None) -> Gauge:
+        return self._get_or_create(Gauge, name, help, labelnames, collect)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help, labelnames, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+registry = Registry()
+
+class RequestMetricsMiddleware:
+    """ASGI middleware timing HTTP requests by method, route template and status
+
+    Routes are labeled by their template (/lesson/{lesson_id}), so ids in
+    paths do not multiply series. Requests no route matched, rejected
+    before routing or served by mounts are labeled "other".
+    """
+
+    def __init__(self, app, histogram: Optional[Histogram] = None):
+        self.app = app
+        self.histogram = histogram or registry.histogram(
+            "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status")
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            # The router stores the matched route in the shared scope
+            route = getattr(scope.get("route"), "path", None) or "other"
+            self.histogram.observe(time.perf_counter() - start, scope["method"], route, str(status))
+
+async def start_metrics_server(host: str, port: int):
+    """Serve /metrics on a small aiohttp server, return its runner for cleanup()"""
+    from aiohttp import web
+
+    async def handle(request: web.Request) -> web.Response:
+        return web.Response(body=registry.render().encode('utf-8'), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
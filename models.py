@@ -0,0 +1,159 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+import copy
+import sys
+
+# Marks a field that is absent from the stored dict, so round trips stay lossless
+MISSING = object()
+
+ENUM_FIELDS = ("payment_status", "motivation", "experience")
+
+def _pack_ints(values: Any) -> Any:
+    """Pack a list of ints into a tuple, small ints are shared objects"""
+    if isinstance(values, list) and all(type(v) is int for v in values):
+        return tuple(values)
+    return copy.deepcopy(values)
+
+def _pack_strs(values: Any) -> Any:
+    """Pack a list of strings into a tuple of interned strings"""
+    if isinstance(values, list) and all(type(v) is str for v in values):
+        return tuple(sys.intern(v) for v in values)
+    return copy.deepcopy(values)
+
+def _unpack_list(value: Any) -> Any:
+    return list(value) if isinstance(value, tuple) else copy.deepcopy(value)
+
+def _pack_scores(scores: Any) -> Any:
+    """Pack {"1": 3, "2": 2} into a flat (1, 3, 2, 2) tuple"""
+    if not isinstance(scores, dict):
+        return copy.deepcopy(scores)
+    packed = []
+    for lesson_id, score in scores.items():
+        # Only canonical numeric keys and int scores survive the round trip
+        if (type(lesson_id) is not str or type(score) is not int
+                or not lesson_id.isdigit() or str(int(lesson_id)) != lesson_id):
+            return copy.deepcopy(scores)
+        packed.append(int(lesson_id))
+        packed.append(score)
+    return tuple(packed)
+
+def _unpack_scores(value: Any) -> Any:
+    if isinstance(value, tuple):
+        return {str(value[i]): value[i + 1] for i in range(0, len(value), 2)}
+    return copy.deepcopy(value)
+
+def _pack_timestamp(value: Any) -> Any:
+    """Keep ISO timestamps as datetime objects when the string can be restored exactly"""
+    if type(value) is str:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            return value
+        if parsed.isoformat() == value:
+            return parsed
+    return value
+
+def _unpack_timestamp(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+class UserRecord:
+    """Compact in-memory form of one user, converts losslessly to the stored dict
+
+    Records are never mutated after creation: DataManager builds a new
+    one on every commit, so caches can share them without copying.
+    """
+
+    __slots__ = (
+        "user_id", "current_lesson", "completed_lessons", "achievements",
+        "total_time", "last_activity", "meditation_streak", "coins",
+        "gifts_received", "quiz_scores", "payment_status", "motivation",
+        "experience", "extra"
+    )
+
+    FIELDS = __slots__[:-1]
+    PACKERS = {
+        "completed_lessons": (_pack_ints, _unpack_list),
+        "achievements": (_pack_strs, _unpack_list),
+        "gifts_received": (_pack_strs, _unpack_list),
+        "quiz_scores": (_pack_scores, _unpack_scores),
+        "last_activity": (_pack_timestamp, _unpack_timestamp),
+    }
+
+    def __init__(self, **fields: Any):
+        for name in self.FIELDS:
+            object.__setattr__(self, name, fields.pop(name, MISSING))
+        object.__setattr__(self, "extra", fields or None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("UserRecord is immutable, build a new one with from_dict()")
+
+    @classmethod
+    def new(cls, user_id: str) -> "UserRecord":
+        """Record of a user that has not been stored yet"""
+        return cls.from_dict({
+            "user_id": user_id,
+            "current_lesson": 0,
+            "completed_lessons": [],
+            "achievements": [],
+            "total_time": 0,
+            "last_activity": None,
+            "meditation_streak": 0,
+            "coins": 0,
+            "gifts_received": [],
+            "quiz_scores": {},
+            "payment_status": "free"
+        })
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "UserRecord":
+        """Build a record from the stored dict schema"""
+        fields = {}
+        extra = {}
+        for name, value in data.items():
+            if name in cls.PACKERS:
+                fields[name] = cls.PACKERS[name][0](value)
+            elif name in ENUM_FIELDS and type(value) is str:
+                fields[name] = sys.intern(value)
+            elif name in cls.FIELDS:
+                fields[name] = copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+            else:
+                extra[name] = copy.deepcopy(value)
+        record = cls(**fields)
+        if extra:
+            object.__setattr__(record, "extra", extra)
+        return record
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get a fresh dict in the stored schema, safe for callers to mutate"""
+        data = {}
+        for name in self.FIELDS:
+            value = getattr(self, name)
+            if value is not MISSING:
+                data[name] = self._unpack(name, value)
+        if self.extra:
+            data.update(copy.deepcopy(self.extra))
+        return data
+
+    @classmethod
+    def _unpack(cls, name: str, value: Any) -> Any:
+        """Turn a packed field back into its stored schema type"""
+        if name in cls.PACKERS:
+            return cls.PACKERS[name][1](value)
+        return copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def get(self, name: str, default: Optional[Any] = None) -> Any:
+        """Read one field in the stored schema type"""
+        if name in self.FIELDS:
+            value = getattr(self, name)
+            return default if value is MISSING else self._unpack(name, value)
+        if self.extra:
+            return copy.deepcopy(self.extra.get(name, default))
+        return default
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        return f"UserRecord({self.to_dict()!r})"
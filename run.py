@@ -47,16 +47,11 @@ def check_env_file():
 
 def start_webapp():
     """Start the FastAPI webapp"""
-    print("🚀 Starting FastAPI webapp on port 8000...")
+    print("🚀 Starting FastAPI webapp...")
     try:
         os.chdir(Path(__file__).parent)
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", 
-            "webapp.app:app", 
-            "--host", "0.0.0.0", 
-            "--port", "8000",
-            "--reload"
-        ], check=False)
+        # Reloads on code changes only with DEV_MODE=1, workers from WEBAPP_WORKERS
+        subprocess.run([sys.executable, "-m", "webapp"], check=False)
     except KeyboardInterrupt:
         print("📱 Webapp stopped")
 
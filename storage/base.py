@@ -0,0 +1,32 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, Optional, Set
+
+class StorageBackend(ABC):
+    """Persistence layer behind DataManager, stores whole user records by id"""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Get stored user record or None"""
+
+    @abstractmethod
+    async def put(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        """Insert or replace user record"""
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        """Insert or replace several user records"""
+        for user_id, user_data in records.items():
+            await self.put(user_id, user_data)
+
+    @abstractmethod
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        """Load every stored user record"""
+
+    @abstractmethod
+    async def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        """Replace the whole data set"""
+
+    def invalidate(self, user_ids: Optional[Set[str]] = None) -> None:
+        """Forget anything held in memory about users changed by another process"""
+
+    async def close(self) -> None:
+        """Release files, connections and threads"""
@@ -0,0 +1,157 @@
+from typing import Iterable, Optional, Set
+import asyncio
+import os
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows, locking stays process-local
+    fcntl = None
+
+ALL_USERS = "*"
+
+class FileLock:
+    """Advisory lock on a file shared by every process using the data volume
+
+    Acquired with non-blocking flock() polls, so waiting never blocks the
+    event loop and a cancelled waiter never ends up owning the lock.
+    Not reentrant.
+    """
+
+    def __init__(self, path: str, poll_interval: float = 0.005, max_poll_interval: float = 0.05):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.max_poll_interval = max_poll_interval
+        self._local_lock = asyncio.Lock()
+        self._fd: Optional[int] = None
+
+    async def acquire(self) -> None:
+        await self._local_lock.acquire()
+        if fcntl is None:
+            return
+        fd = None
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            delay = self.poll_interval
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    break
+                except BlockingIOError:
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, self.max_poll_interval)
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            self._local_lock.release()
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._local_lock.release()
+
+    async def __aenter__(self) -> "FileLock":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
+
+class ChangeFeed:
+    """Append-only log of changed user ids shared between processes
+
+    Writers append "<writer id> <user_id>" lines while holding the FileLock.
+    Readers remember how far they have read and pick up new lines with
+    one stat() per poll. When the log grows past `max_bytes` it is
+    replaced by a new file with a fresh generation header; readers notice
+    the header change and drop everything, since they may have missed
+    entries. The header is compared instead of the inode, inodes of
+    replaced files get reused.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._pid: Optional[int] = None
+        self._writer_id = ""
+        self._header = b""
+        self._inode: Optional[int] = None
+        self._offset = 0
+        self._sync_to_end()
+
+    @property
+    def writer_id(self) -> str:
+        """Id of this process, pids alone repeat across containers and forks"""
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._writer_id = f"{uuid.uuid4().hex[:12]}-{self._pid}"
+        return self._writer_id
+
+    def _sync_to_end(self) -> None:
+        """Skip entries written before this process started"""
+        try:
+            with open(self.path, 'rb') as f:
+                self._header = f.readline()
+                stat = os.fstat(f.fileno())
+        except FileNotFoundError:
+            return
+        self._inode, self._offset = stat.st_ino, stat.st_size
+
+    def poll(self) -> Set[str]:
+        """Get ids changed by other processes since last poll, ALL_USERS if unknown"""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return set()
+        if stat.st_ino == self._inode and stat.st_size == self._offset:
+            return set()
+        return self._read_new()
+
+    def _read_new(self) -> Set[str]:
+        """Read complete lines appended after the current offset"""
+        with open(self.path, 'rb') as f:
+            header = f.readline()
+            rotated = header != self._header
+            if rotated:
+                self._header, self._offset = header, len(header)
+            f.seek(self._offset)
+            chunk = f.read()
+            self._inode = os.fstat(f.fileno()).st_ino
+        end = chunk.rfind(b"\n") + 1
+        self._offset += end
+        if rotated:
+            return {ALL_USERS}
+        changed = set()
+        writer_id = self.writer_id
+        for line in chunk[:end].decode('utf-8').splitlines():
+            writer, _, user_id = line.partition(" ")
+            if writer != writer_id and user_id:
+                changed.add(user_id)
+        return changed
+
+    def publish(self, user_ids: Iterable[str]) -> None:
+        """Record changed ids, caller must hold the FileLock and have polled"""
+        writer_id = self.writer_id
+        lines = "".join(f"{writer_id} {user_id}\n" for user_id in user_ids).encode('utf-8')
+        if not lines:
+            return
+        if not self._header or self._offset >= self.max_bytes or not os.path.exists(self.path):
+            # Start a new generation, written aside and swapped in atomically
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            header = f"#gen {uuid.uuid4().hex}\n".encode('utf-8')
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(header + lines)
+            os.replace(tmp_path, self.path)
+            self._header = header
+        else:
+            with open(self.path, 'ab') as f:
+                f.write(lines)
+        # Nobody else can append while we hold the lock, skip our own lines
+        stat = os.stat(self.path)
+        self._inode, self._offset = stat.st_ino, stat.st_size
@@ -0,0 +1,106 @@
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Any, Dict, Hashable, List, Optional, Set, Tuple
+
+class SortedIndex:
+    """User ids ordered by a comparable key, for range queries"""
+
+    def __init__(self):
+        self._keys: Dict[str, Any] = {}
+        self._sorted: List[Tuple[Any, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def set(self, user_id: str, key: Any) -> None:
+        """Index user under key, None removes the user"""
+        old = self._keys.get(user_id)
+        if old is not None:
+            if old == key:
+                return
+            del self._sorted[bisect_left(self._sorted, (old, user_id))]
+            del self._keys[user_id]
+        if key is not None:
+            insort(self._sorted, (key, user_id))
+            self._keys[user_id] = key
+
+    def below(self, key: Any) -> List[str]:
+        """Ids with index key < key"""
+        return [user_id for _, user_id in self._sorted[:bisect_left(self._sorted, (key,))]]
+
+    def between(self, low: Any, high: Optional[Any] = None) -> List[str]:
+        """Ids with low <= index key <= high"""
+        start = bisect_left(self._sorted, (low,))
+        if high is None:
+            return [user_id for _, user_id in self._sorted[start:]]
+        # Every user id sorts after the bare (high,) tuple, so bound by the next key
+        end = bisect_right(self._sorted, (high, "\U0010ffff"))
+        return [user_id for _, user_id in self._sorted[start:end]]
+
+class GroupIndex:
+    """User ids grouped by an exact value"""
+
+    def __init__(self):
+        self._values: Dict[str, Hashable] = {}
+        self._groups: Dict[Hashable, Set[str]] = {}
+
+    def set(self, user_id: str, value: Optional[Hashable]) -> None:
+        """Index user under value, None removes the user"""
+        old = self._values.pop(user_id, None)
+        if old is not None:
+            group = self._groups[old]
+            group.discard(user_id)
+            if not group:
+                del self._groups[old]
+        if value is not None:
+            self._groups.setdefault(value, set()).add(user_id)
+            self._values[user_id] = value
+
+    def get(self, value: Hashable) -> Set[str]:
+        return set(self._groups.get(value, ()))
+
+def _activity_key(value: Any) -> Optional[datetime]:
+    """Parse last_activity into a naive datetime, None if absent or unreadable"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def _int_key(value: Any) -> Optional[int]:
+    return value if type(value) is int else None
+
+class UserIndexes:
+    """Secondary indexes over user records, kept up to date one user at a time"""
+
+    def __init__(self):
+        self.last_activity = SortedIndex()
+        self.meditation_streak = SortedIndex()
+        self.payment_status = GroupIndex()
+        self.current_lesson = GroupIndex()
+        self._never_active: Set[str] = set()
+
+    def update(self, user_id: str, user_data: Optional[Dict[str, Any]]) -> None:
+        """Reindex one user, None removes the user from every index"""
+        user_data = user_data or {}
+        last_activity = _activity_key(user_data.get("last_activity"))
+        self.last_activity.set(user_id, last_activity)
+        if last_activity is None and user_data:
+            self._never_active.add(user_id)
+        else:
+            self._never_active.discard(user_id)
+        self.meditation_streak.set(user_id, _int_key(user_data.get("meditation_streak")))
+        status = user_data.get("payment_status")
+        self.payment_status.set(user_id, status if isinstance(status, str) else None)
+        self.current_lesson.set(user_id, _int_key(user_data.get("current_lesson")))
+
+    def inactive_since(self, cutoff: datetime, include_never_active: bool = True) -> List[str]:
+        """Ids whose last activity is before cutoff"""
+        user_ids = self.last_activity.below(cutoff)
+        if include_never_active:
+            user_ids.extend(sorted(self._never_active))
+        return user_ids
@@ -0,0 +1,187 @@
+import json
+import aiofiles
+from typing import Dict, Any, List, Optional, Set
+import asyncio
+import copy
+import os
+
+from storage.base import StorageBackend
+from storage.json_backend import read_document, write_document
+from storage.serializers import FastJsonSerializer, Serializer
+
+def diff_record(user_id: str, old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Describe the change from old to new record as compact mutation ops"""
+    if old is None:
+        return [{"op": "set", "u": user_id, "v": new}]
+    ops = []
+    changed = {}
+    for field, value in new.items():
+        previous = old.get(field)
+        if field in old and previous == value:
+            continue
+        if field in old and type(previous) is int and type(value) is int:
+            ops.append({"op": "incr", "u": user_id, "f": field, "v": value - previous})
+        elif (isinstance(previous, list) and isinstance(value, list)
+              and len(value) > len(previous) and value[:len(previous)] == previous):
+            ops.append({"op": "append", "u": user_id, "f": field, "v": value[len(previous):]})
+        else:
+            changed[field] = value
+    if changed:
+        ops.append({"op": "set", "u": user_id, "v": changed})
+    removed = [field for field in old if field not in new]
+    if removed:
+        ops.append({"op": "del", "u": user_id, "v": removed})
+    return ops
+
+def apply_op(data: Dict[str, Dict[str, Any]], op: Dict[str, Any]) -> None:
+    """Apply one mutation op to the in-memory data set"""
+    user_data = data.setdefault(op["u"], {})
+    kind = op["op"]
+    if kind == "set":
+        user_data.update(op["v"])
+    elif kind == "incr":
+        user_data[op["f"]] = user_data.get(op["f"], 0) + op["v"]
+    elif kind == "append":
+        user_data.setdefault(op["f"], []).extend(op["v"])
+    elif kind == "del":
+        for field in op["v"]:
+            user_data.pop(field, None)
+    else:
+        raise ValueError(f"Unknown journal op: {kind}")
+
+class JournalBackend(StorageBackend):
+    """Snapshot plus append-only journal of mutation ops
+
+    Every write appends a few small JSON lines (set field, increment
+    coins, append achievement) instead of rewriting a whole document.
+    All users are kept in memory; after `compact_after` journal entries
+    the state is written to a fresh snapshot and the journal is truncated.
+    Journal lines carry a sequence number and the snapshot records the
+    last one it includes, so a crash in the middle of compaction never
+    applies an op twice.
+    """
+
+    def __init__(self, snapshot_path: str = "data/users.snapshot.json",
+                 journal_path: str = "data/users.journal", compact_after: int = 10000,
+                 serializer: Optional[Serializer] = None):
+        self.snapshot_path = snapshot_path
+        self.serializer = serializer or FastJsonSerializer()
+        self.journal_path = journal_path
+        self.compact_after = compact_after
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._seq = 0
+        self._journal_entries = 0
+        self._lock = asyncio.Lock()
+
+    async def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Replay snapshot and journal on first use"""
+        if self._data is not None:
+            return self._data
+        snapshot = await read_document(self.snapshot_path, self.serializer)
+        data = snapshot.get("users", {})
+        self._seq = snapshot.get("seq", 0)
+        self._journal_entries = 0
+        try:
+            async with aiofiles.open(self.journal_path, 'r', encoding='utf-8') as f:
+                async for line in f:
+                    try:
+                        op = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn line of a crashed write, or one another process is
+                        # writing right now; the op never completed, later ones did
+                        continue
+                    self._journal_entries += 1
+                    if op["s"] <= self._seq:
+                        continue
+                    apply_op(data, op)
+                    self._seq = op["s"]
+        except FileNotFoundError:
+            pass
+        self._data = data
+        return data
+
+    async def _append(self, ops: List[Dict[str, Any]]) -> None:
+        """Append ops to the journal, caller must hold the lock"""
+        lines = []
+        for op in ops:
+            self._seq += 1
+            op["s"] = self._seq
+            lines.append(json.dumps(op, ensure_ascii=False, separators=(',', ':')))
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        self._drop_torn_tail()
+        async with aiofiles.open(self.journal_path, 'a', encoding='utf-8') as f:
+            await f.write("\n".join(lines) + "\n")
+        self._journal_entries += len(ops)
+        if self._journal_entries >= self.compact_after:
+            await self._compact()
+
+    def _drop_torn_tail(self) -> None:
+        """Cut a partial last line left by a crashed write, caller must hold the lock
+
+        Appending after it would glue the next op onto the partial line and
+        make both unreadable.
+        """
+        try:
+            f = open(self.journal_path, 'r+b')
+        except FileNotFoundError:
+            return
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            position = end
+            while position > 0:
+                start = max(0, position - 4096)
+                f.seek(start)
+                chunk = f.read(position - start)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    position = start + newline + 1
+                    break
+                position = start
+            if position != end:
+                f.truncate(position)
+
+    async def _compact(self) -> None:
+        """Write current state as snapshot and truncate the journal"""
+        await write_document(self.snapshot_path, {"seq": self._seq, "users": self._data}, self.serializer)
+        async with aiofiles.open(self.journal_path, 'w', encoding='utf-8') as f:
+            await f.write("")
+        self._journal_entries = 0
+
+    def invalidate(self, user_ids: Optional[Set[str]] = None) -> None:
+        # Another process appended to the journal, replay it on next access
+        self._data = None
+
+    async def compact(self) -> None:
+        """Force compaction of the journal into the snapshot"""
+        async with self._lock:
+            await self._load()
+            await self._compact()
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = await self._load()
+        user_data = data.get(str(user_id))
+        return copy.deepcopy(user_data) if user_data is not None else None
+
+    async def put(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        await self.put_many({str(user_id): user_data})
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        async with self._lock:
+            data = await self._load()
+            ops = []
+            for user_id, user_data in copy.deepcopy(records).items():
+                ops.extend(diff_record(user_id, data.get(user_id), user_data))
+            if not ops:
+                return
+            for op in ops:
+                apply_op(data, op)
+            await self._append(ops)
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return copy.deepcopy(await self._load())
+
+    async def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        async with self._lock:
+            await self._load()
+            self._data = copy.deepcopy(data)
+            await self._compact()
@@ -0,0 +1,145 @@
+import json
+import aiofiles
+from typing import Dict, Any, List, Optional
+import asyncio
+import os
+import zlib
+
+from storage.base import StorageBackend
+from storage.serializers import (
+    FastJsonSerializer, PrettyJsonSerializer, Serializer, decode_document
+)
+
+SHARD_META_FILE = "_meta.json"
+
+async def read_document(path: str, serializer: Optional[Serializer] = None) -> Dict[str, Any]:
+    """Read one document, missing or broken files read as empty"""
+    try:
+        async with aiofiles.open(path, 'rb') as f:
+            content = await f.read()
+    except FileNotFoundError:
+        return {}
+    return decode_document(serializer or FastJsonSerializer(), content)
+
+async def write_document(path: str, data: Dict[str, Any], serializer: Optional[Serializer] = None) -> None:
+    """Atomically replace one document"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    content = (serializer or FastJsonSerializer()).dumps(data)
+    tmp_path = f"{path}.tmp"
+    async with aiofiles.open(tmp_path, 'wb') as f:
+        await f.write(content)
+    os.replace(tmp_path, path)
+
+class JsonFileBackend(StorageBackend):
+    """All users in a single document, every write rewrites the file"""
+
+    def __init__(self, file_path: str = "data/users.json", serializer: Optional[Serializer] = None):
+        self.file_path = file_path
+        self.serializer = serializer or PrettyJsonSerializer()
+        self._lock = asyncio.Lock()
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        data = await read_document(self.file_path, self.serializer)
+        return data.get(str(user_id))
+
+    async def put(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        await self.put_many({str(user_id): user_data})
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        async with self._lock:
+            data = await read_document(self.file_path, self.serializer)
+            data.update(records)
+            await write_document(self.file_path, data, self.serializer)
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        return await read_document(self.file_path, self.serializer)
+
+    async def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        async with self._lock:
+            await write_document(self.file_path, data, self.serializer)
+
+class ShardedJsonBackend(StorageBackend):
+    """Users hash-bucketed into shard files, a write rewrites only one shard"""
+
+    def __init__(self, shard_dir: str = "data/users", shard_count: int = 256,
+                 serializer: Optional[Serializer] = None):
+        self.shard_dir = shard_dir
+        self.serializer = serializer or FastJsonSerializer()
+        self.shard_count = shard_count
+        recorded = self._read_shard_count()
+        if recorded is not None and recorded != shard_count:
+            # Users would be looked up in the wrong shards
+            raise ValueError(
+                f"Shards in {shard_dir} were written with SHARD_COUNT={recorded}, not {shard_count}; "
+                f"set SHARD_COUNT={recorded} or migrate the data"
+            )
+        self._meta_written = recorded is not None
+        self._lock = asyncio.Lock()
+
+    def _read_shard_count(self) -> Optional[int]:
+        """Shard count recorded next to existing shards, None if there is none"""
+        try:
+            with open(os.path.join(self.shard_dir, SHARD_META_FILE), 'r', encoding='utf-8') as f:
+                return int(json.load(f)["shard_count"])
+        except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+            return None
+
+    async def _write_meta(self, force: bool = False) -> None:
+        """Record the shard count, before the first shard is written; caller holds the lock"""
+        if force or not self._meta_written:
+            await write_document(
+                os.path.join(self.shard_dir, SHARD_META_FILE),
+                {"shard_count": self.shard_count}
+            )
+            self._meta_written = True
+
+    def _shard_path(self, user_id: str) -> str:
+        """Get path of the shard file holding a user"""
+        bucket = zlib.crc32(str(user_id).encode('utf-8')) % self.shard_count
+        return os.path.join(self.shard_dir, f"{bucket:04x}{self.serializer.extension}")
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        shard = await read_document(self._shard_path(user_id), self.serializer)
+        return shard.get(str(user_id))
+
+    async def put(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        await self.put_many({str(user_id): user_data})
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        shards: Dict[str, Dict[str, Any]] = {}
+        for user_id, user_data in records.items():
+            shards.setdefault(self._shard_path(user_id), {})[user_id] = user_data
+        async with self._lock:
+            await self._write_meta()
+            for path, changed in shards.items():
+                shard = await read_document(path, self.serializer)
+                shard.update(changed)
+                await write_document(path, shard, self.serializer)
+
+    def _shard_files(self) -> List[str]:
+        """Paths of existing shard files"""
+        if not os.path.isdir(self.shard_dir):
+            return []
+        return [
+            os.path.join(self.shard_dir, name) for name in sorted(os.listdir(self.shard_dir))
+            if name.endswith(self.serializer.extension) and name != SHARD_META_FILE
+        ]
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        data = {}
+        for path in self._shard_files():
+            data.update(await read_document(path, self.serializer))
+        return data
+
+    async def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        shards: Dict[str, Dict[str, Any]] = {}
+        for user_id, user_data in data.items():
+            shards.setdefault(self._shard_path(user_id), {})[user_id] = user_data
+        async with self._lock:
+            await self._write_meta(force=True)
+            for path, shard in shards.items():
+                await write_document(path, shard, self.serializer)
+            # Replaces the whole data set, shards left without users go away
+            for path in self._shard_files():
+                if path not in shards:
+                    os.remove(path)
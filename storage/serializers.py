@@ -0,0 +1,100 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+class Serializer(ABC):
+    """Turns a user data document into bytes and back"""
+
+    name = ""
+    extension = ""
+
+    @abstractmethod
+    def dumps(self, data: Any) -> bytes:
+        """Encode a document"""
+
+    @abstractmethod
+    def loads(self, content: bytes) -> Any:
+        """Decode a document"""
+
+class PrettyJsonSerializer(Serializer):
+    """Indented JSON, the original human-readable users.json format"""
+
+    name = "json-pretty"
+    extension = ".json"
+
+    def dumps(self, data: Any) -> bytes:
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+
+    def loads(self, content: bytes) -> Any:
+        return json.loads(content)
+
+class FastJsonSerializer(Serializer):
+    """Compact JSON, encoded with orjson when it is installed"""
+
+    name = "json"
+    extension = ".json"
+
+    def dumps(self, data: Any) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(data)
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def loads(self, content: bytes) -> Any:
+        if orjson is not None:
+            return orjson.loads(content)
+        return json.loads(content)
+
+class MsgpackSerializer(Serializer):
+    """Compact binary MessagePack encoding"""
+
+    name = "msgpack"
+    extension = ".msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("msgpack serializer requires the msgpack package: pip install msgpack")
+
+    def dumps(self, data: Any) -> bytes:
+        return msgpack.packb(data, use_bin_type=True)
+
+    def loads(self, content: bytes) -> Any:
+        # strict_map_key=False keeps int keys loadable, the schema itself uses str keys
+        return msgpack.unpackb(content, raw=False, strict_map_key=False)
+
+SERIALIZERS = {
+    serializer.name: serializer
+    for serializer in (PrettyJsonSerializer, FastJsonSerializer, MsgpackSerializer)
+}
+
+def get_serializer(name: str) -> Serializer:
+    """Get serializer by its config name"""
+    try:
+        return SERIALIZERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown serializer: {name}") from None
+
+def serializer_for_path(path: str) -> Serializer:
+    """Guess serializer from file extension"""
+    if path.endswith(MsgpackSerializer.extension):
+        return MsgpackSerializer()
+    return FastJsonSerializer()
+
+def decode_document(serializer: Serializer, content: bytes) -> Dict[str, Any]:
+    """Decode file content, empty or broken content decodes as empty document"""
+    if not content or content.isspace():
+        return {}
+    try:
+        data = serializer.loads(content)
+    except (ValueError, TypeError):
+        return {}
+    return data if isinstance(data, dict) else {}
@@ -0,0 +1,106 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable, TypeVar
+import asyncio
+import os
+
+from storage.base import StorageBackend
+from storage.serializers import FastJsonSerializer
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+class SQLiteBackend(StorageBackend):
+    """Users as rows of an SQLite database in WAL mode
+
+    sqlite3 calls block, so they run on a small thread pool with one
+    connection per worker thread. WAL lets readers proceed while a writer
+    commits, and SQLite file locks keep the bot and webapp processes from
+    clobbering each other when they share the data volume.
+    """
+
+    def __init__(self, db_path: str = "data/users.db", max_workers: int = 4,
+                 busy_timeout: float = 5.0):
+        self.db_path = db_path
+        self.busy_timeout = busy_timeout
+        self._json = FastJsonSerializer()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sqlite")
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get the connection owned by the current worker thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(SCHEMA)
+            conn.commit()
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    async def _run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        """Run a blocking database call on the thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connect()))
+
+    async def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        def query(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            row = conn.execute("SELECT data FROM users WHERE user_id = ?", (str(user_id),)).fetchone()
+            return self._json.loads(row[0]) if row else None
+        return await self._run(query)
+
+    async def put(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        await self.put_many({str(user_id): user_data})
+
+    async def put_many(self, records: Dict[str, Dict[str, Any]]) -> None:
+        rows = [
+            (user_id, self._json.dumps(user_data).decode('utf-8'))
+            for user_id, user_data in records.items()
+        ]
+        def upsert(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.executemany(
+                    "INSERT INTO users (user_id, data) VALUES (?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET data = excluded.data",
+                    rows
+                )
+        await self._run(upsert)
+
+    async def load_all(self) -> Dict[str, Dict[str, Any]]:
+        def query(conn: sqlite3.Connection) -> Dict[str, Dict[str, Any]]:
+            return {
+                user_id: self._json.loads(data)
+                for user_id, data in conn.execute("SELECT user_id, data FROM users")
+            }
+        return await self._run(query)
+
+    async def save_all(self, data: Dict[str, Dict[str, Any]]) -> None:
+        rows = [
+            (user_id, self._json.dumps(user_data).decode('utf-8'))
+            for user_id, user_data in data.items()
+        ]
+        def replace(conn: sqlite3.Connection) -> None:
+            with conn:
+                conn.execute("DELETE FROM users")
+                conn.executemany("INSERT INTO users (user_id, data) VALUES (?, ?)", rows)
+        await self._run(replace)
+
+    async def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
@@ -0,0 +1,38 @@
+import asyncio
+
+from storage.journal_backend import JournalBackend
+
+def make_backend(tmp_path) -> JournalBackend:
+    return JournalBackend(str(tmp_path / "users.snapshot.json"), str(tmp_path / "users.journal"))
+
+def test_append_after_torn_tail_survives_restart(tmp_path):
+    async def scenario():
+        backend = make_backend(tmp_path)
+        await backend.put("1", {"user_id": "1", "coins": 0})
+
+        # Crash in the middle of writing the next op
+        with open(tmp_path / "users.journal", 'a', encoding='utf-8') as f:
+            f.write('{"op":"set","u":"1","v":{"coi')
+
+        backend = make_backend(tmp_path)
+        await backend.put("2", {"user_id": "2", "coins": 5})
+        await backend.put("1", {"user_id": "1", "coins": 10})
+
+        backend = make_backend(tmp_path)
+        return await backend.get("1"), await backend.get("2")
+
+    user_1, user_2 = asyncio.run(scenario())
+    assert user_1 == {"user_id": "1", "coins": 10}
+    assert user_2 == {"user_id": "2", "coins": 5}
+
+def test_torn_line_in_the_middle_is_skipped(tmp_path):
+    async def scenario():
+        backend = make_backend(tmp_path)
+        await backend.put("1", {"user_id": "1", "coins": 0})
+        # Journal written before torn tails were cut on append
+        with open(tmp_path / "users.journal", 'a', encoding='utf-8') as f:
+            f.write('{"op":"set","u":"1","v":{"coi\n')
+            f.write('{"op":"set","u":"2","v":{"user_id":"2"},"s":3}\n')
+        return await make_backend(tmp_path).get("2")
+
+    assert asyncio.run(scenario()) == {"user_id": "2"}
@@ -0,0 +1,24 @@
+import asyncio
+
+import pytest
+
+from storage.json_backend import ShardedJsonBackend
+
+def test_first_put_records_shard_count(tmp_path):
+    backend = ShardedJsonBackend(str(tmp_path), shard_count=16)
+    asyncio.run(backend.put("1", {"user_id": "1"}))
+
+    with pytest.raises(ValueError):
+        ShardedJsonBackend(str(tmp_path), shard_count=256)
+
+    backend = ShardedJsonBackend(str(tmp_path), shard_count=16)
+    assert asyncio.run(backend.get("1")) == {"user_id": "1"}
+
+def test_save_all_replaces_every_shard(tmp_path):
+    async def scenario():
+        backend = ShardedJsonBackend(str(tmp_path), shard_count=16)
+        await backend.put_many({str(i): {"user_id": str(i)} for i in range(50)})
+        await backend.save_all({"a": {"user_id": "a"}})
+        return await ShardedJsonBackend(str(tmp_path), shard_count=16).load_all()
+
+    assert asyncio.run(scenario()) == {"a": {"user_id": "a"}}
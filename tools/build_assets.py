@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Build static assets: minify, fingerprint and precompress CSS and JS
+
+Usage: python -m tools.build_assets [--static static] [--keep 3]
+
+Every static/**/*.css and *.js file is written to static/dist with a
+content hash in its name, next to .gz and .br variants, and
+static/dist/manifest.json maps source paths to the hashed ones. Hashed
+files never change, so they are served with year-long immutable caching.
+Files of the last --keep builds stay in static/dist for pages that were
+rendered before a rebuild.
+"""
+from typing import List
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+DIST_DIR = "dist"
+MANIFEST_FILE = "manifest.json"
+# Hashed files of recent builds, for pruning
+BUILDS_FILE = "builds.json"
+KEEP_BUILDS = 3
+EXTENSIONS = (".css", ".js")
+
+def minify_css(source: str) -> str:
+    if rcssmin is not None:
+        return rcssmin.cssmin(source)
+    source = re.sub(r"/\*.*?\*/", "", source, flags=re.S)
+    source = re.sub(r"\s+", " ", source)
+    source = re.sub(r"\s*([{};:,>])\s*", r"\1", source)
+    return source.replace(";}", "}").strip()
+
+def minify_js(source: str) -> str:
+    if rjsmin is not None:
+        return rjsmin.jsmin(source)
+    # Without a JS tokenizer only whitespace-only changes are safe
+    lines = (line.strip() for line in source.splitlines())
+    return "\n".join(line for line in lines if line)
+
+MINIFIERS = {".css": minify_css, ".js": minify_js}
+
+def hashed_name(path: str, content: bytes) -> str:
+    """css/lesson.css -> css/lesson.<8 hex digits of sha256>.css"""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{hashlib.sha256(content).hexdigest()[:8]}{ext}"
+
+def write_file(path: str, content: bytes) -> None:
+    """Write through a temporary file, a reader never sees half of it"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def write_variants(path: str, content: bytes) -> None:
+    """Write a file and its precompressed .gz and .br variants"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_file(path, content)
+    write_file(f"{path}.gz", gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_file(f"{path}.br", brotli.compress(content, quality=11))
+
+def prune(dist_dir: str, builds: List[List[str]]) -> int:
+    """Delete built files no kept build refers to, return how many"""
+    kept = {MANIFEST_FILE, BUILDS_FILE}
+    for targets in builds:
+        for target in targets:
+            kept.update((target, f"{target}.gz", f"{target}.br"))
+    removed = 0
+    for root, dirs, files in os.walk(dist_dir, topdown=False):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.relpath(path, dist_dir).replace(os.sep, "/") not in kept:
+                os.remove(path)
+                removed += 1
+        if root != dist_dir and not os.listdir(root):
+            os.rmdir(root)
+    return removed
+
+def build(static_dir: str, keep: int = KEEP_BUILDS) -> dict:
+    """Build static assets into static/dist, return the manifest
+
+    Hashed files are added next to those of earlier builds, then the
+    manifest is swapped in one rename, so a running server never sees
+    half a build. Files of the last keep builds stay, pages rendered
+    before a rebuild still refer to them.
+    """
+    dist_dir = os.path.join(static_dir, DIST_DIR)
+    manifest = {}
+    for root, dirs, files in os.walk(static_dir):
+        dirs[:] = sorted(d for d in dirs if os.path.join(root, d) != dist_dir)
+        for name in sorted(files):
+            ext = os.path.splitext(name)[1]
+            if ext not in EXTENSIONS:
+                continue
+            source_path = os.path.join(root, name)
+            rel_path = os.path.relpath(source_path, static_dir).replace(os.sep, "/")
+            with open(source_path, 'r', encoding='utf-8') as f:
+                content = MINIFIERS[ext](f.read()).encode('utf-8')
+            target = hashed_name(rel_path, content)
+            write_variants(os.path.join(dist_dir, target), content)
+            manifest[rel_path] = target
+
+    # Targets of the builds before this one, oldest first
+    builds_path = os.path.join(dist_dir, BUILDS_FILE)
+    try:
+        with open(builds_path, 'r', encoding='utf-8') as f:
+            builds = json.load(f)
+    except (FileNotFoundError, ValueError):
+        builds = []
+    builds = (builds + [sorted(manifest.values())])[-max(keep, 1):]
+
+    os.makedirs(dist_dir, exist_ok=True)
+    write_file(builds_path, json.dumps(builds, indent=2).encode('utf-8'))
+    write_file(os.path.join(dist_dir, MANIFEST_FILE),
+               json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    prune(dist_dir, builds)
+    return manifest
+
+def main():
+    parser = argparse.ArgumentParser(description="Minify, fingerprint and precompress static assets")
+    parser.add_argument("--static", default="static", help="static files directory")
+    parser.add_argument("--keep", type=int, default=KEEP_BUILDS,
+                        help="builds whose files stay in dist, for pages rendered before a rebuild")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.static):
+        print(f"❌ {args.static} not found")
+        sys.exit(1)
+
+    manifest = build(args.static, args.keep)
+    for source, target in manifest.items():
+        size = os.path.getsize(os.path.join(args.static, DIST_DIR, target))
+        print(f"{source} -> {DIST_DIR}/{target} ({size} bytes)")
+    if brotli is None:
+        print("⚠️ brotli is not installed, only .gz variants were written")
+    print(f"✅ {len(manifest)} assets built")
+
+if __name__ == "__main__":
+    main()
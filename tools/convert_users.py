@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Convert a users document between serializer formats
+
+Usage: python -m tools.convert_users data/users.json data/users.msgpack
+       python -m tools.convert_users data/users.msgpack data/users.json --to json-pretty
+"""
+import argparse
+import asyncio
+import os
+import sys
+
+from storage.json_backend import read_document, write_document
+from storage.serializers import SERIALIZERS, get_serializer, serializer_for_path
+
+async def convert(source: str, dest: str, source_format: str, dest_format: str) -> int:
+    """Rewrite source document into dest, return user count"""
+    reader = get_serializer(source_format) if source_format else serializer_for_path(source)
+    writer = get_serializer(dest_format) if dest_format else serializer_for_path(dest)
+
+    data = await read_document(source, reader)
+    await write_document(dest, data, writer)
+
+    if await read_document(dest, writer) != data:
+        raise SystemExit("❌ Converted document does not match the source")
+    return len(data)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert users data between serializer formats")
+    parser.add_argument("source", help="file to read")
+    parser.add_argument("dest", help="file to write")
+    parser.add_argument("--from", dest="source_format", default="", choices=["", *SERIALIZERS],
+                        help="source format, guessed from extension by default")
+    parser.add_argument("--to", dest="dest_format", default="", choices=["", *SERIALIZERS],
+                        help="target format, guessed from extension by default")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ {args.source} not found")
+        sys.exit(1)
+    if os.path.abspath(args.source) == os.path.abspath(args.dest):
+        print("❌ Source and destination are the same file")
+        sys.exit(1)
+
+    count = asyncio.run(convert(args.source, args.dest, args.source_format, args.dest_format))
+    print(f"✅ Converted {count} users: {args.source} -> {args.dest}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Copy user data from one storage layout into another
+
+Usage: python -m tools.migrate_storage --to sharded [--from json]
+       python -m tools.migrate_storage --to sqlite
+       python -m tools.migrate_storage --to sharded --from-serializer json-pretty --to-serializer msgpack
+       python -m tools.migrate_storage --to json --to-serializer msgpack --to-path data/users.msgpack
+"""
+import argparse
+import asyncio
+import dataclasses
+import os
+import sys
+from typing import Optional
+
+from config import Config, config
+from data_manager import STORAGE_MODES, create_backend, storage_files
+from storage.serializers import SERIALIZERS
+
+# Environment variables holding the files of each storage mode
+PATH_SETTINGS = {
+    "json": (("DATA_FILE", "data_file"),),
+    "sharded": (("SHARD_DIR", "shard_dir"),),
+    "sqlite": (("SQLITE_PATH", "sqlite_path"),),
+    "journal": (("SNAPSHOT_PATH", "snapshot_path"), ("JOURNAL_PATH", "journal_path")),
+}
+
+def target_config(mode: str, shards: int, serializer: str, path: Optional[str]) -> Config:
+    """Config of the target storage, path replaces the file (or directory) it writes"""
+    target = dataclasses.replace(config, storage_mode=mode, shard_count=shards, serializer=serializer)
+    if not path:
+        return target
+    if mode == "json":
+        return dataclasses.replace(target, data_file=path)
+    if mode == "sharded":
+        return dataclasses.replace(target, shard_dir=path)
+    if mode == "sqlite":
+        return dataclasses.replace(target, sqlite_path=path)
+    return dataclasses.replace(target, snapshot_path=path, journal_path=f"{path}.journal")
+
+def shared_files(source: Config, target: Config) -> bool:
+    """Whether both storages would use any of the same files"""
+    source_files = {os.path.realpath(path) for path in storage_files(source)}
+    return any(os.path.realpath(path) in source_files for path in storage_files(target))
+
+async def migrate(source_cfg: Config, target_cfg: Config) -> int:
+    """Copy every user from source backend into target backend, return user count"""
+    source = create_backend(source_cfg)
+    target = create_backend(target_cfg)
+    target_mode = target_cfg.storage_mode
+    try:
+        data = await source.load_all()
+
+        if await target.load_all():
+            raise SystemExit(f"❌ Target storage '{target_mode}' already contains users, refusing to overwrite")
+
+        await target.save_all(data)
+
+        # Read everything back to make sure nothing was lost on the way
+        migrated = await target.load_all()
+        if migrated != data:
+            raise SystemExit("❌ Migrated data does not match the source")
+        return len(data)
+    finally:
+        await source.close()
+        await target.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate users between storage backends")
+    parser.add_argument("--from", dest="source", default="json", choices=STORAGE_MODES,
+                        help="storage to read users from")
+    parser.add_argument("--to", dest="target", required=True, choices=STORAGE_MODES,
+                        help="storage to write users into")
+    parser.add_argument("--shards", type=int, default=config.shard_count,
+                        help="number of buckets for the sharded layout")
+    parser.add_argument("--from-serializer", default=config.serializer, choices=["", *SERIALIZERS],
+                        help="format of the source files, SERIALIZER by default")
+    parser.add_argument("--to-serializer", default=config.serializer, choices=["", *SERIALIZERS],
+                        help="format of the target files, SERIALIZER by default")
+    parser.add_argument("--to-path", default="",
+                        help="file (directory for sharded) to write the target into, "
+                             "the configured path of that storage by default")
+    args = parser.parse_args()
+
+    if args.shards <= 0:
+        print("❌ --shards must be positive")
+        sys.exit(1)
+
+    source_cfg = dataclasses.replace(config, storage_mode=args.source, serializer=args.from_serializer)
+    target_cfg = target_config(args.target, args.shards, args.to_serializer, args.to_path)
+    # Writing the target would overwrite the data still being read
+    if shared_files(source_cfg, target_cfg):
+        print("❌ Source and target storage use the same files, pass --to-path")
+        sys.exit(1)
+
+    count = asyncio.run(migrate(source_cfg, target_cfg))
+    print(f"✅ Migrated {count} users from {args.source} to {args.target}")
+    settings = f"STORAGE_MODE={args.target}"
+    if args.target == "sharded" and args.shards != config.shard_count:
+        settings += f" SHARD_COUNT={args.shards}"
+    if args.to_path:
+        for name, field in PATH_SETTINGS[args.target]:
+            settings += f" {name}={getattr(target_cfg, field)}"
+    print(f"Set {settings} to start using it")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Post simulated Telegram updates to the bot's webhook endpoint
+
+Usage: python -m tools.simulate_webhook [--url http://127.0.0.1:8081/telegram/webhook]
+                                        [--updates 100] [--concurrency 10] [--text /start]
+                                        [--user-id 123456789] [--bad-secret]
+
+Start the bot with WEBHOOK_URL set first. Updates carry the same secret
+token as Telegram would, --bad-secret checks that they are refused.
+Replies go to the real Bot API, so updates from made-up users end in
+"chat not found" errors in the bot log: pass your own --user-id to see
+the replies in Telegram.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+import aiohttp
+
+from bot.webhook import webhook_path, webhook_secret
+from config import config
+
+def make_update(update_id: int, user_id: int, text: str) -> dict:
+    """A private chat text message update, shaped like the ones Telegram sends"""
+    user = {"id": user_id, "is_bot": False, "first_name": "Test", "username": f"test{user_id}", "language_code": "ru"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "from": user,
+            "chat": {"id": user_id, "type": "private", "first_name": "Test", "username": f"test{user_id}"},
+            "date": int(time.time()),
+            "text": text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {})
+        }
+    }
+
+async def post_updates(url: str, secret: str, updates: int, concurrency: int,
+                       text: str, user_id: int = 0) -> dict:
+    """Post updates from concurrency clients, return status counts and latencies"""
+    statuses = {}
+    latencies = []
+    next_update = 0
+
+    async def client(session: aiohttp.ClientSession) -> None:
+        nonlocal next_update
+        while next_update < updates:
+            i = next_update
+            next_update += 1
+            update = make_update(int(time.time()) * 1000 + i, user_id or 100000000 + i, text)
+            start = time.perf_counter()
+            async with session.post(url, json=update, headers={"X-Telegram-Bot-Api-Secret-Token": secret}) as response:
+                await response.read()
+                statuses[response.status] = statuses.get(response.status, 0) + 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "statuses": statuses,
+        "rps": updates / elapsed,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Post simulated updates to the bot webhook")
+    parser.add_argument("--url", default=None, help="webhook endpoint, by default the local one from WEBHOOK_URL")
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--text", default="/start", help="message text of every update")
+    parser.add_argument("--user-id", type=int, default=0, help="send every update as this user")
+    parser.add_argument("--bad-secret", action="store_true", help="send a wrong secret token, expect 401")
+    args = parser.parse_args()
+
+    if args.url is None and not config.webhook_url:
+        print("❌ Set WEBHOOK_URL or pass --url")
+        sys.exit(1)
+    url = args.url or f"http://127.0.0.1:{config.webhook_listen_port}{webhook_path(config)}"
+    secret = "wrong-secret" if args.bad_secret else webhook_secret(config)
+
+    result = asyncio.run(post_updates(url, secret, args.updates, args.concurrency, args.text, args.user_id))
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(result["statuses"].items()))
+    print(f"{url}")
+    print(f"Statuses: {statuses}")
+    print(f"{result['rps']:.1f} updates/s, p50 {result['p50_ms']:.2f}ms, p99 {result['p99_ms']:.2f}ms")
+
+    expected = 401 if args.bad_secret else 200
+    if set(result["statuses"]) != {expected}:
+        print(f"❌ Expected only {expected} responses")
+        sys.exit(1)
+    print("✅ Done")
+
+if __name__ == "__main__":
+    main()
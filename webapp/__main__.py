@@ -0,0 +1,43 @@
+"""
+Run the webapp: python -m webapp
+
+WEBAPP_WORKERS processes share the port, DEV_MODE=1 runs a single
+process that reloads on code changes instead. Client addresses are
+taken from X-Forwarded-For only on requests from FORWARDED_ALLOW_IPS.
+"""
+import uvicorn
+
+from config import config
+
+def check_worker_config() -> None:
+    """Refuse settings that keep user state inside one worker process"""
+    if config.webapp_workers <= 1 or config.dev_mode:
+        return
+    if not config.shared_data:
+        raise SystemExit("WEBAPP_WORKERS > 1 needs SHARED_DATA=1, workers would serve stale cached users")
+    if config.write_behind:
+        raise SystemExit("WEBAPP_WORKERS > 1 cannot be used with WRITE_BEHIND=1, "
+                         "workers would overwrite each other's unflushed changes")
+
+def main():
+    check_worker_config()
+    if config.dev_mode:
+        uvicorn.run(
+            "webapp.app:app",
+            host="0.0.0.0",
+            port=config.webapp_port,
+            reload=True,
+            forwarded_allow_ips=config.forwarded_allow_ips
+        )
+    else:
+        uvicorn.run(
+            "webapp.app:app",
+            host="0.0.0.0",
+            port=config.webapp_port,
+            workers=config.webapp_workers,
+            # Per-client rate limits key on the address nginx puts into X-Forwarded-For
+            forwarded_allow_ips=config.forwarded_allow_ips
+        )
+
+if __name__ == "__main__":
+    main()
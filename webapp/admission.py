@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+import math
+import re
+import time
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from metrics import registry
+
+SHED_REQUESTS = registry.counter(
+    "http_requests_shed_total", "API requests rejected by admission control", ("route", "status")
+)
+
+class TokenBucket:
+    """rate tokens per second, up to burst saved up"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Take a token, return 0 if there was one, else seconds until there is"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class BucketTable:
+    """Token buckets per key, the least recently used are dropped past max_keys
+
+    A dropped bucket comes back full, by then it has usually refilled anyway.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+
+    def take(self, key: str, now: float) -> float:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket.take(now)
+
+class AdmissionRule:
+    """Limits of one API route, path in FastAPI form: /api/lesson/{lesson_id}/complete
+
+    per_client=False leaves the route out of per-client buckets, for routes
+    a shared caller such as the bot hits on behalf of many users.
+    """
+
+    def __init__(self, method: str, path: str, max_in_flight: int, per_client: bool = True):
+        self.method = method
+        self.path = path
+        self.max_in_flight = max_in_flight
+        self.per_client = per_client
+        self.pattern = re.compile("^" + re.sub(r"\{[^/]+\}", "[^/]+", path) + "$")
+        self.in_flight = 0
+
+class AdmissionMiddleware:
+    """Sheds API requests beyond what the worker can serve, before any work is done
+
+    Each client gets a token bucket (429 when empty), all clients together
+    share a global one (503 when empty), and each route runs at most
+    max_in_flight requests at once (503 beyond that). Rejections carry
+    Retry-After. Clients are told apart by address: user ids in requests
+    are whatever the client sends. Requests matching no rule pass through.
+    A rate of 0 turns that bucket off, limits are per worker process.
+    """
+
+    def __init__(self, app: ASGIApp, rules: Iterable[AdmissionRule],
+                 global_rate: float = 0, global_burst: int = 0,
+                 client_rate: float = 0, client_burst: int = 0, max_clients: int = 10000):
+        self.app = app
+        self.rules: List[AdmissionRule] = list(rules)
+        now = time.monotonic()
+        self.global_bucket = TokenBucket(global_rate, max(global_burst, 1), now) if global_rate > 0 else None
+        self.clients = BucketTable(client_rate, max(client_burst, 1), max_clients) if client_rate > 0 else None
+
+    def match(self, method: str, path: str) -> Optional[AdmissionRule]:
+        for rule in self.rules:
+            if rule.method == method and rule.pattern.match(path):
+                return rule
+        return None
+
+    def admit(self, scope: Scope, rule: AdmissionRule) -> Optional[Tuple[int, float, str]]:
+        """None to admit, else (status, retry after, detail)"""
+        now = time.monotonic()
+        if self.clients is not None and rule.per_client:
+            client = scope.get("client")
+            wait = self.clients.take(client[0] if client else "", now)
+            if wait:
+                return 429, wait, "Too many requests"
+        if self.global_bucket is not None:
+            wait = self.global_bucket.take(now)
+            if wait:
+                return 503, wait, "Server busy"
+        if rule.in_flight >= rule.max_in_flight:
+            return 503, 1.0, "Server busy"
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        rule = self.match(scope["method"], scope["path"])
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = self.admit(scope, rule)
+        if rejection is not None:
+            status, wait, detail = rejection
+            SHED_REQUESTS.inc(rule.path, str(status))
+            response = JSONResponse(
+                {"detail": detail},
+                status_code=status,
+                headers={"Retry-After": str(max(1, math.ceil(wait)))}
+            )
+            await response(scope, receive, send)
+            return
+
+        rule.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            rule.in_flight -= 1
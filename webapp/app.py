@@ -1,14 +1,65 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Header, Request, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional
+from fastapi.concurrency import run_in_threadpool
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import contextlib
 import json
+import logging
 import os
 
-app = FastAPI()
+from config import config
+from data_manager import data_manager
+from events import EventPublisher, completion_event
+from logging_setup import setup_logging, shutdown_logging
+from metrics import CONTENT_TYPE, RequestMetricsMiddleware, registry
+from webapp.admission import AdmissionMiddleware, AdmissionRule
+from webapp.assets import AssetManifest, ImmutableStaticFiles
+from webapp.grading import CompiledQuestion, GradingEngine, grade_batch
+from webapp.lessons import LessonStore
+from webapp.micro_cache import MicroCache
+from webapp.page_cache import PageCache
+from webapp.telegram_auth import validate_init_data
+
+# Lesson completions are pushed to the bot through the MQTT broker
+events = EventPublisher(config)
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs in every worker process: each has its own logging thread, caches
+    # and storage handles, user state itself lives in shared storage
+    setup_logging("webapp", config)
+    logging.info("Webapp worker started", extra={"pid": os.getpid()})
+    events.start()
+    yield
+    await events.close()
+    # Flush pending writes of completions before the worker exits
+    await data_manager.close()
+    shutdown_logging()
+
+app = FastAPI(lifespan=lifespan)
+
+# Load shedding for the API, added before CORS so rejections still carry CORS headers
+app.add_middleware(
+    AdmissionMiddleware,
+    rules=[
+        AdmissionRule("POST", "/api/submit-quiz", config.api_max_in_flight),
+        # CPU heavy, a couple at a time is plenty
+        AdmissionRule("POST", "/api/submit-quiz/batch", 2),
+        AdmissionRule("POST", "/api/lesson/{lesson_id}/complete", config.api_max_in_flight),
+        # The bot checks completion for all its users from one address
+        AdmissionRule("GET", "/api/lesson/{lesson_id}/progress", config.api_max_in_flight, per_client=False),
+        AdmissionRule("GET", "/api/lesson/{lesson_id}/check_completion", config.api_max_in_flight, per_client=False),
+    ],
+    global_rate=config.api_rate_limit,
+    global_burst=config.api_rate_burst,
+    client_rate=config.client_rate_limit,
+    client_burst=config.client_rate_burst
+)
 
 # Add CORS middleware
 app.add_middleware(
@@ -19,15 +70,24 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
-# Mount static files
+# Outermost, so shed requests and CORS preflights are timed too
+app.add_middleware(RequestMetricsMiddleware)
+
+# Mount static files, fingerprinted builds first so they get immutable caching
+app.mount("/static/dist", ImmutableStaticFiles(directory="static/dist", check_dir=False), name="static-dist")
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 # Templates
 templates = Jinja2Templates(directory="templates")
 
+# Templates link static files through asset_url(), see tools/build_assets.py
+assets = AssetManifest("static")
+templates.env.globals["asset_url"] = assets.url
+
 class QuizAnswer(BaseModel):
     question_id: int
-    answer: str
+    # A list of options answers a multi-answer question
+    answer: Union[str, List[str]]
 
 class QuizSubmission(BaseModel):
     user_id: str
@@ -41,262 +101,100 @@ async def home():
     return {"message": "Meditation Course WebApp", "status": "ruing"}
 
 
-# Lesson content
-LESSONS = {
-    1: {
-        "title": "Основы медитации",
-        "subtitle": "Первые шаги к внутренней гармонии",
-        "content": """
-        <h3>Что такое медитация?</h3>
-        <p>Медитация — это древняя практика тренировки ума, которая помогает достичь состояния глубокого покоя и осознанности. Это не попытка очистить ум от мыслей, а обучение наблюдению за ними без суждения.</p>
-        
-        <h3>Основные принципы</h3>
-        <ul>
-            <li><strong>Осознанность</strong> — полное присутствие в настоящем моменте</li>
-            <li><strong>Принятие</strong> — безусловное принятие того, что происходит</li>
-            <li><strong>Терпение</strong> — понимание, что результаты приходят постепенно</li>
-            <li><strong>Регулярность</strong> — ежедневная практика важнее длительности</li>
-        </ul>
-        
-        <h3>Польза медитации</h3>
-        <div class="benefits">
-            <div class="benefit-item">
-                <strong>Снижение стресса</strong>
-                <p>Медитация снижает уровень кортизола — гормона стресса</p>
-            </div>
-            <div class="benefit-item">
-                <strong>Улучшение концентрации</strong>
-                <p>Тренирует способность удерживать внимание</p>
-            </div>
-            <div class="benefit-item">
-                <strong>Эмоциональное равновесие</strong>
-                <p>Помогает управлять эмоциями и реакциями</p>
-            </div>
-            <div class="benefit-item">
-                <strong>Лучший сон</strong>
-                <p>Успокаивает нервную систему перед сном</p>
-            </div>
-        </div>
-        
-        <h3>Первая практика: Дыхание</h3>
-        <p>Начнем с самого простого упражнения:</p>
-        <ol>
-            <li>Найди удобное положение сидя</li>
-            <li>Закрой глаза или мягко сфокусируй взгляд</li>
-            <li>Начни замечать свое дыхание</li>
-            <li>Не пытайся его изменить — просто наблюдай</li>
-            <li>Когда ум отвлечется, мягко верни внимание к дыханию</li>
-        </ol>
-        
-        <div class="meditation-timer">
-            <h4>Попробуй сейчас: 3-минутная медитация</h4>
-            <button id="start-meditation" class="meditation-btn">🧘‍♀️ Начать медитацию</button>
-            <div id="timer" class="timer hidden">
-                <div class="timer-display">3:00</div>
-                <div class="timer-instruction">Наблюдай за дыханием...</div>
-            </div>
-        </div>
-        """,
-        "quiz": [
-            {
-                "id": 1,
-                "question": "Что является главной целью медитации?",
-                "options": [
-                    "Очистить ум от всех мыслей",
-                    "Научиться наблюдать за умом без суждения",
-                    "Достичь экстаза и блаженства"
-                ],
-                "correct": 1
-            },
-            {
-                "id": 2,
-                "question": "Что делать, если во время медитации отвлекся?",
-                "options": [
-                    "Расстроиться и прекратить практику",
-                    "Бороться с отвлекающими мыслями",
-                    "Мягко вернуть внимание к дыханию"
-                ],
-                "correct": 2
-            },
-            {
-                "id": 3,
-                "question": "Как часто нужно медитировать для получения результата?",
-                "options": [
-                    "Раз в неделю по часу",
-                    "Каждый день хотя бы несколько минут",
-                    "Только когда есть проблемы"
-                ],
-                "correct": 1
-            }
-        ]
-    },
-    2: {
-        "title": "Дыхательные техники",
-        "subtitle": "Практическое освоение техник дыхания",
-        "content": """
-        <h3>Дыхание как основа медитации</h3>
-        <p>Дыхание — это мост между сознательным и бессознательным, между телом и умом. Изучая различные техники дыхания, мы получаем мощный инструмент для управления своим состоянием.</p>
-        
-        <div class="video-container">
-            <h4>Видео-урок: Основные техники дыхания</h4>
-            <div class="video-placeholder">
-                <div class="video-play-btn">▶️</div>
-                <p>Видео-урок будет здесь</p>
-                <small>Длительность: 8 минут</small>
-            </div>
-        </div>
-        
-        <h3>Техника "4-7-8"</h3>
-        <p>Эта техника особенно эффективна для расслабления и засыпания:</p>
-        <ol>
-            <li><strong>Вдох на 4 счета</strong> через нос</li>
-            <li><strong>Задержка на 7 счетов</strong></li>
-            <li><strong>Выдох на 8 счетов</strong> через рот</li>
-            <li>Повтори цикл 4-8 раз</li>
-        </ol>
-        
-        <div class="breathing-guide">
-            <h4>Практика с аудио-гидом</h4>
-            <div class="audio-controls">
-                <button id="start-breathing" class="breathing-btn">🌊 Начать дыхательную практику</button>
-                <div id="breathing-guide" class="breathing-display hidden">
-                    <div class="breathing-circle"></div>
-                    <div class="breathing-instruction">Приготовься...</div>
-                    <div class="breathing-counter">Цикл 1 из 4</div>
-                </div>
-            </div>
-        </div>
-        
-        <h3>Звуки природы для медитации</h3>
-        <p>Природные звуки помогают глубже погрузиться в медитативное состояние:</p>
-        
-        <div class="nature-sounds">
-            <div class="sound-option" data-sound="rain">
-                <div class="sound-icon">🌧️</div>
-                <h4>Звук дождя</h4>
-                <p>Успокаивающий шум дождя</p>
-                <button class="play-sound">Слушать</button>
-            </div>
-            <div class="sound-option" data-sound="ocean">
-                <div class="sound-icon">🌊</div>
-                <h4>Океанские волны</h4>
-                <p>Ритмичный шум прибоя</p>
-                <button class="play-sound">Слушать</button>
-            </div>
-            <div class="sound-option" data-sound="forest">
-                <div class="sound-icon">🌲</div>
-                <h4>Звуки леса</h4>
-                <p>Пение птиц и шелест листьев</p>
-                <button class="play-sound">Слушать</button>
-            </div>
-        </div>
-        
-        <h3>Медитация с визуализацией</h3>
-        <p>Визуализация усиливает эффект медитации:</p>
-        <div class="visualization-guide">
-            <p><strong>Упражнение "Золотой свет":</strong></p>
-            <ol>
-                <li>Закрой глаза и представь теплый золотистый свет</li>
-                <li>Этот свет входит в тебя с каждым вдохом</li>
-                <li>Свет заполняет все твое тело, принося покой</li>
-                <li>С выдохом отпускай напряжение и тревоги</li>
-            </ol>
-        </div>
-        """,
-        "quiz": [
-            {
-                "id": 1,
-                "question": "В технике дыхания '4-7-8' на сколько счетов делается вдох?",
-                "options": ["4", "7", "8"],
-                "correct": 0
-            },
-            {
-                "id": 2,
-                "question": "Какие звуки наиболее эффективны для медитации?",
-                "options": [
-                    "Громкая музыка",
-                    "Звуки природы", 
-                    "Речь и разговоры"
-                ],
-                "correct": 1
-            },
-            {
-                "id": 3,
-                "question": "Что такое визуализация в медитации?",
-                "options": [
-                    "Просмотр видео во время практики",
-                    "Создание мысленных образов для усиления эффекта",
-                    "Рисование после медитации"
-                ],
-                "correct": 1
-            }
-        ]
-    }
-}
+# Lesson content is read from files on demand, see webapp/lessons.py
+lessons = LessonStore(config.lessons_dir, config.lesson_cache_size, config.lesson_check_interval)
+
+# Answer keys compiled per lesson when it is loaded
+grading = GradingEngine()
+
+def render_lesson(lesson_id: int) -> str:
+    """Render lesson page, the output depends only on the lesson"""
+    return templates.get_template("lesson.html").render(
+        lesson_id=lesson_id,
+        lesson=lessons.get(lesson_id)
+    )
+
+# Rendered once per lesson, reopening the WebApp is served from memory
+lesson_pages = PageCache(render_lesson)
+
+def on_lesson_change(lesson_id: int, lesson: Optional[dict]) -> None:
+    """Keep answer keys and rendered pages in step with lesson files"""
+    if lesson is None:
+        grading.forget_lesson(lesson_id)
+    else:
+        try:
+            grading.compile_lesson(lesson_id, lesson)
+        except ValueError:
+            # The page still opens, the quiz is not graded until the file is fixed
+            logging.exception(f"Invalid quiz in lesson {lesson_id}")
+    lesson_pages.invalidate(lesson_id)
+
+lessons.add_listener(on_lesson_change)
 
 @app.get("/lesson/{lesson_id}", response_class=HTMLResponse)
 async def get_lesson(request: Request, lesson_id: int):
     """Get lesson page"""
-    if lesson_id not in LESSONS:
+    if lessons.get(lesson_id) is None:
         raise HTTPException(status_code=404, detail="Lesson not found")
-    
-    lesson = LESSONS[lesson_id]
-    return templates.TemplateResponse("lesson.html", {
-        "request": request,
-        "lesson_id": lesson_id,
-        "lesson": lesson
-    })
+    if assets.check():
+        # Pages link the previous build
+        lesson_pages.invalidate()
+
+    return lesson_pages.response(request, lesson_id)
+
+# Largest quiz submission accepted, a full quiz is well under 1 KB
+MAX_SUBMISSION_BYTES = 64 * 1024
+
+async def read_body(request: Request, max_bytes: int) -> bytes:
+    """Read request body, rejecting empty and oversized ones before parsing"""
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    body = await request.body()
+    if not body:
+        raise HTTPException(status_code=400, detail="Empty request body")
+    if len(body) > max_bytes:
+        raise HTTPException(status_code=413, detail="Request body too large")
+    return body
+
+def body_validation_error(error: ValidationError) -> RequestValidationError:
+    """Report malformed JSON and schema errors alike as FastAPI's usual 422"""
+    return RequestValidationError([
+        {**detail, "loc": ("body", *detail["loc"])} for detail in error.errors(include_url=False)
+    ])
+
+def decode_submission(body: bytes) -> QuizSubmission:
+    """Parse and validate a submission straight from bytes in one pass"""
+    try:
+        return QuizSubmission.model_validate_json(body)
+    except ValidationError as e:
+        raise body_validation_error(e) from None
 
 @app.post("/api/submit-quiz")
 async def submit_quiz(request: Request):
     """Submit quiz answers"""
-    print("=== ПОЛУЧЕН ЗАПРОС НА /api/submit-quiz ===")
-
-    try:
-        # Read raw request data
-        body = await request.body()
-        print(f"RAW BODY: {body}")
-
-        if not body:
-            print("ОШИБКА: Тело запроса пустое!")
-            raise HTTPException(status_code=400, detail="Empty request body")
-
-        # Parse JSON manually
-        import json
-        data = json.loads(body.decode('utf-8'))
-        print(f"PARSED DATA: {data}")
-
-        # Create QuizSubmission from parsed data
-        submission = QuizSubmission(**data)
-        print(f"SUBMISSION CREATED: user={submission.user_id}, lesson={submission.lesson_id}")
-        print(f"ANSWERS: {submission.answers}")
-
-        lesson = LESSONS.get(submission.lesson_id)
-        if not lesson:
-            print(f"ОШИБКА: Урок {submission.lesson_id} не найден!")
-            raise HTTPException(status_code=404, detail="Lesson not found")
-
-        print(f"УРОК НАЙДЕН: {lesson['title']}")
-
-    except Exception as e:
-        print(f"КРИТИЧЕСКАЯ ОШИБКА: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"TRACEBACK: {traceback.format_exc()}")
-        raise HTTPException(status_code=500, detail=f"Server error: {str(e)}")
+    submission = decode_submission(await read_body(request, MAX_SUBMISSION_BYTES))
+    if lessons.get(submission.lesson_id) is None:
+        raise HTTPException(status_code=404, detail="Lesson not found")
+    if not grading.has_lesson(submission.lesson_id):
+        # The quiz in the lesson file is malformed, see on_lesson_change
+        raise HTTPException(status_code=503, detail="Quiz unavailable")
 
     # Calculate score
-    correct_answers = 0
-    total_questions = len(lesson["quiz"])
-
-    for answer in submission.answers:
-        question = next((q for q in lesson["quiz"] if q["id"] == answer.question_id), None)
-        if question and question["options"][question["correct"]] == answer.answer:
-            correct_answers += 1
-
-    score = correct_answers
-    percentage = (correct_answers / total_questions) * 100
-
-    print(f"Результат: {score}/{total_questions} ({percentage}%)")
+    result = grading.grade(
+        submission.lesson_id,
+        ((answer.question_id, answer.answer) for answer in submission.answers)
+    )
+    score = result.score
+    total_questions = result.total
+    percentage = result.percentage
+
+    logging.info("Quiz graded", extra={
+        "user_id": submission.user_id,
+        "lesson_id": submission.lesson_id,
+        "score": score,
+        "total": total_questions
+    })
 
     # Here you would normally save to database
     # For demo, we'll just return the result
@@ -311,6 +209,73 @@ async def submit_quiz(request: Request):
         "lesson_id": submission.lesson_id
     })
 
+def grade_submissions(submissions: List[QuizSubmission], keys: Dict[int, List[CompiledQuestion]],
+                      errors: Dict[int, str]) -> dict:
+    """Grade many submissions at once, with per-question results of each lesson
+
+    keys holds the answer key of every lesson that can be graded, errors
+    why the others cannot, see submit_quiz_batch.
+    """
+    results, batches = grade_batch(keys, [
+        (submission.lesson_id, [(answer.question_id, answer.answer) for answer in submission.answers])
+        for submission in submissions
+    ])
+    graded = []
+    for submission, result in zip(submissions, results):
+        if result is None:
+            graded.append({
+                "user_id": submission.user_id,
+                "lesson_id": submission.lesson_id,
+                "error": errors[submission.lesson_id]
+            })
+            continue
+        graded.append({
+            "user_id": submission.user_id,
+            "lesson_id": submission.lesson_id,
+            "score": result.score,
+            "total": result.total,
+            "percentage": result.percentage
+        })
+    return {
+        "results": graded,
+        "lessons": {
+            lesson_id: {
+                "question_ids": batch.question_ids,
+                "submissions": batch.submissions,
+                "correct": batch.correct.tolist()
+            }
+            for lesson_id, batch in batches.items()
+        }
+    }
+
+# Validator for the whole batch, built once
+submission_list = TypeAdapter(List[QuizSubmission])
+
+# Largest batch body accepted
+MAX_BATCH_BYTES = 32 * 1024 * 1024
+
+@app.post("/api/submit-quiz/batch")
+async def submit_quiz_batch(request: Request):
+    """Grade stored submissions in bulk, nothing is saved"""
+    body = await read_body(request, MAX_BATCH_BYTES)
+    try:
+        submissions = submission_list.validate_json(body)
+    except ValidationError as e:
+        raise body_validation_error(e) from None
+    keys = {}
+    errors = {}
+    for lesson_id in {submission.lesson_id for submission in submissions}:
+        # Loading a lesson compiles its answer key, done here on the event loop.
+        # Taken right away: loading the next lessons may evict this one
+        if lessons.get(lesson_id) is None:
+            errors[lesson_id] = "Lesson not found"
+        elif not grading.has_lesson(lesson_id):
+            errors[lesson_id] = "Quiz unavailable"
+        else:
+            keys[lesson_id] = grading.questions(lesson_id)
+    # Grading thousands of submissions is CPU work, keep it off the event loop
+    return JSONResponse(await run_in_threadpool(grade_submissions, submissions, keys, errors))
+
 def get_score_message(percentage: float) -> str:
     """Get message based on score percentage"""
     if percentage >= 100:
@@ -322,39 +287,75 @@ def get_score_message(percentage: float) -> str:
     else:
         return "📚 Стоит повторить материал урока еще раз!"
 
+# Progress and completion checks are repeated by the bot and WebApp pages
+status_cache = MicroCache(config.status_cache_ttl, config.status_cache_size)
+
+# Changes made by the bot or other workers, seen through the change feed
+data_manager.add_change_listener(status_cache.invalidate)
+
+registry.counter("status_cache_hits_total", "Progress and completion checks served from memory",
+                 collect=lambda: {(): status_cache.hits})
+registry.counter("status_cache_misses_total", "Progress and completion checks read from storage",
+                 collect=lambda: {(): status_cache.misses})
+
+async def cached_status(key: tuple, load: Callable[[], Awaitable[dict]]) -> Response:
+    """Serve a per-user status response from the micro-cache, key is (route, user_id, ...)"""
+    # One stat() of the change feed, drops entries of users changed elsewhere
+    data_manager.sync_changes()
+    body = status_cache.get(key)
+    if body is None:
+        version = status_cache.version()
+        body = JSONResponse(await load()).body
+        status_cache.put(key, body, version)
+    return Response(content=body, media_type="application/json")
+
 @app.get("/api/lesson/{lesson_id}/progress")
 async def get_lesson_progress(lesson_id: int, user_id: str):
     """Get user progress for lesson"""
-    # In real app, fetch from database
-    return JSONResponse({
-        "completed": False,
-        "score": None,
-        "time_spent": 0
-    })
-
-# Simple in-memory storage for demo
-completed_lessons = {}
+    async def load() -> dict:
+        result = await data_manager.get_lesson_result(user_id, lesson_id)
+        return {
+            "completed": result is not None,
+            "score": result["score"] if result else None,
+            "time_spent": 0
+        }
+    return await cached_status(("progress", user_id, lesson_id), load)
 
 class LessonCompletionRequest(BaseModel):
     user_id: str
-    score: int
+    # Fractional with partial-credit questions
+    score: Union[int, float]
     percentage: float
 
+def verify_user(init_data: str, user_id: str) -> bool:
+    """Check that the WebApp initData is signed by Telegram and belongs to user_id
+
+    Returns False for unsigned requests when WEBAPP_AUTH=0, raises 401/403 otherwise.
+    """
+    user = validate_init_data(init_data, config.bot_token, config.init_data_max_age)
+    if user is None:
+        if config.webapp_auth:
+            raise HTTPException(status_code=401, detail="Invalid Telegram init data")
+        return False
+    if str(user["id"]) != user_id:
+        raise HTTPException(status_code=403, detail="Init data belongs to another user")
+    return True
+
 @app.post("/api/lesson/{lesson_id}/complete")
-async def complete_lesson(lesson_id: int, request: LessonCompletionRequest):
+async def complete_lesson(lesson_id: int, request: LessonCompletionRequest,
+                          init_data: str = Header("", alias="X-Telegram-Init-Data")):
     """Mark lesson as completed"""
-    print(f"Получен запрос на завершение урока {lesson_id} для пользователя {request.user_id}")
+    verified = verify_user(init_data, request.user_id)
+    # Stored in the user record, so other workers and the bot see it too
+    await data_manager.save_lesson_result(request.user_id, lesson_id, request.score, request.percentage)
+    status_cache.invalidate(request.user_id)
+    if verified:
+        # Queued only, the bot rewards the user as soon as the broker delivers it.
+        # Only for signed requests: the bot messages this chat and grants achievements
+        events.publish(completion_event(request.user_id, lesson_id, request.score, request.percentage))
 
-    completed_lessons[f"{request.user_id}_{lesson_id}"] = {
-        "lesson_id": lesson_id,
-        "score": request.score,
-        "percentage": request.percentage,
-        "completed_at": "2024-01-01"  # Demo timestamp
-    }
-
-    print(f"Урок {lesson_id} отмечен как завершенный для пользователя {request.user_id}")
+    logging.info("Lesson completed", extra={"user_id": request.user_id, "lesson_id": lesson_id})
 
-    print(completed_lessons)
     return JSONResponse({
         "success": True,
         "message": "Lesson marked as completed"
@@ -366,17 +367,21 @@ async def check_lesson_completion(lesson_id: int, user_id: str = ""):
     if not user_id:
         return JSONResponse({"completed": False})
 
-    key = f"{user_id}_{lesson_id}"
-    completion_data = completed_lessons.get(key)
+    async def load() -> dict:
+        completion_data = await data_manager.get_lesson_result(user_id, lesson_id)
+        if completion_data:
+            return {
+                "completed": True,
+                "score": completion_data["score"],
+                "percentage": completion_data["percentage"]
+            }
+        return {"completed": False}
+    return await cached_status(("check_completion", user_id, lesson_id), load)
 
-    if completion_data:
-        return JSONResponse({
-            "completed": True,
-            "score": completion_data["score"],
-            "percentage": completion_data["percentage"]
-        })
-    else:
-        return JSONResponse({"completed": False})
+@app.get("/metrics")
+async def metrics():
+    """Metrics of this worker process in Prometheus text format"""
+    return Response(content=registry.render(), headers={"Content-Type": CONTENT_TYPE})
 
 # Catch all other routes (put at the end)
 @app.get("/{filename}")
@@ -388,4 +393,4 @@ async def catch_static_files(filename: str):
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, forwarded_allow_ips=config.forwarded_allow_ips)
\ No newline at end of file
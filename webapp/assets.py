@@ -0,0 +1,64 @@
+from typing import Dict, Optional
+import json
+import os
+import time
+
+from fastapi.staticfiles import StaticFiles
+from starlette.responses import Response
+
+class AssetManifest:
+    """Maps static paths to the fingerprinted files of tools/build_assets.py
+
+    Without a build the original files are served, so development works
+    without building. The manifest is re-read when a rebuild replaces it.
+    """
+
+    def __init__(self, static_dir: str = "static", url_prefix: str = "/static",
+                 check_interval: float = 1.0):
+        self.static_dir = static_dir
+        self.url_prefix = url_prefix
+        self.check_interval = check_interval
+        self.path = os.path.join(static_dir, "dist", "manifest.json")
+        self._entries: Dict[str, str] = {}
+        self._mtime: Optional[int] = None
+        self._checked_at = float("-inf")
+        self.check()
+
+    def check(self) -> bool:
+        """Reload the manifest if it changed on disk, return True if it did"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime == self._mtime:
+            return False
+        entries = {}
+        if mtime is not None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                # Caught mid-rebuild, try again on next check
+                return False
+        self._entries = entries
+        self._mtime = mtime
+        return True
+
+    def url(self, path: str) -> str:
+        """URL of a static file, fingerprinted when built"""
+        hashed = self._entries.get(path)
+        if hashed is not None:
+            return f"{self.url_prefix}/dist/{hashed}"
+        return f"{self.url_prefix}/{path}"
+
+class ImmutableStaticFiles(StaticFiles):
+    """Static files whose names change with their content, cached for a year"""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
@@ -0,0 +1,186 @@
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Answer = Union[str, List[str]]
+
+class CompiledQuestion:
+    """Answer key of one quiz question
+
+    "correct" in lesson content is an option index, or a list of option
+    indexes for multi-answer questions. With "partial_credit" a question
+    scores the share of correct options picked, minus wrong picks.
+    """
+
+    __slots__ = (
+        "question_id", "position", "options", "correct", "correct_text", "correct_mask", "partial_credit"
+    )
+
+    def __init__(self, question: Dict[str, Any], position: int):
+        self.question_id: int = question["id"]
+        self.position = position
+        self.options: Dict[str, int] = {option: index for index, option in enumerate(question["options"])}
+        correct = question["correct"]
+        indexes = [correct] if isinstance(correct, int) else list(correct)
+        if not indexes:
+            raise ValueError(f"Question {self.question_id} has no correct option")
+        for index in indexes:
+            if not isinstance(index, int) or not 0 <= index < len(question["options"]):
+                raise ValueError(f"Question {self.question_id} has no option {index!r} marked correct")
+        self.correct: FrozenSet[int] = frozenset(indexes)
+        # Single-answer questions grade with one string comparison
+        self.correct_text: Optional[str] = question["options"][indexes[0]] if len(indexes) == 1 else None
+        self.partial_credit: bool = bool(question.get("partial_credit", False))
+        if len(self.options) > 64:
+            raise ValueError(f"Question {self.question_id} has more than 64 options")
+        self.correct_mask = sum(1 << index for index in self.correct)
+
+    def mask(self, answer: Answer) -> int:
+        """Encode an answer as a bit mask of chosen options"""
+        if isinstance(answer, str):
+            answer = [answer]
+        mask = 0
+        for option in answer:
+            index = self.options.get(option)
+            if index is not None:
+                mask |= 1 << index
+        return mask
+
+    def grade(self, answer: Answer) -> float:
+        """Get points for an answer, from 0 to 1"""
+        if isinstance(answer, str):
+            if self.correct_text is not None:
+                return 1.0 if answer == self.correct_text else 0.0
+            answer = [answer]
+        chosen = {self.options[option] for option in answer if option in self.options}
+        if not self.partial_credit:
+            return 1.0 if chosen == self.correct else 0.0
+        hits = len(chosen & self.correct)
+        misses = len(chosen) - hits
+        return max(hits - misses, 0) / len(self.correct)
+
+def _score(points: float) -> Union[int, float]:
+    return int(points) if points.is_integer() else round(points, 2)
+
+class GradeResult:
+    __slots__ = ("score", "total", "percentage")
+
+    def __init__(self, score: Union[int, float], total: int):
+        self.score = score
+        self.total = total
+        self.percentage = (score / total) * 100 if total else 0.0
+
+class GradingEngine:
+    """Grades quiz answers against answer keys compiled from lesson content"""
+
+    def __init__(self, lessons: Optional[Dict[int, Dict[str, Any]]] = None):
+        self._questions: Dict[Tuple[int, int], CompiledQuestion] = {}
+        self._lessons: Dict[int, List[CompiledQuestion]] = {}
+        for lesson_id, lesson in (lessons or {}).items():
+            self.compile_lesson(lesson_id, lesson)
+
+    def compile_lesson(self, lesson_id: int, lesson: Dict[str, Any]) -> None:
+        """Build (or rebuild) the answer key of one lesson
+
+        Raises ValueError for a malformed quiz, the lesson is left without a key.
+        """
+        self.forget_lesson(lesson_id)
+        questions = [CompiledQuestion(question, position) for position, question in enumerate(lesson.get("quiz", []))]
+        self._lessons[lesson_id] = questions
+        for question in questions:
+            self._questions[(lesson_id, question.question_id)] = question
+
+    def forget_lesson(self, lesson_id: int) -> None:
+        """Drop the answer key of one lesson"""
+        for question in self._lessons.pop(lesson_id, ()):
+            del self._questions[(lesson_id, question.question_id)]
+
+    def has_lesson(self, lesson_id: int) -> bool:
+        return lesson_id in self._lessons
+
+    def questions(self, lesson_id: int) -> List[CompiledQuestion]:
+        """Get compiled questions of a lesson in quiz order"""
+        return self._lessons.get(lesson_id, [])
+
+    def question(self, lesson_id: int, question_id: int) -> Optional[CompiledQuestion]:
+        return self._questions.get((lesson_id, question_id))
+
+    def grade(self, lesson_id: int, answers: Iterable[Tuple[int, Answer]]) -> GradeResult:
+        """Grade (question_id, answer) pairs, unknown questions are ignored
+
+        A question answered more than once is graded by its last answer.
+        """
+        answered = dict(answers)
+        points = 0.0
+        for question_id, answer in answered.items():
+            question = self._questions.get((lesson_id, question_id))
+            if question is not None:
+                points += question.grade(answer)
+        return GradeResult(_score(points), len(self._lessons.get(lesson_id, ())))
+
+def _popcount(masks: np.ndarray) -> np.ndarray:
+    """Count set bits of every uint64 in an array"""
+    as_bytes = masks.view(np.uint8).reshape(*masks.shape, 8)
+    return np.unpackbits(as_bytes, axis=-1).sum(axis=-1)
+
+class LessonBatch:
+    """Grades of all batch submissions for one lesson
+
+    correct[i][j] holds the points (0 to 1) that submission
+    submissions[i] got for question question_ids[j].
+    """
+
+    __slots__ = ("lesson_id", "question_ids", "submissions", "correct")
+
+    def __init__(self, lesson_id: int, question_ids: List[int], submissions: List[int], correct: np.ndarray):
+        self.lesson_id = lesson_id
+        self.question_ids = question_ids
+        self.submissions = submissions
+        self.correct = correct
+
+def grade_batch(keys: Dict[int, List[CompiledQuestion]],
+                submissions: Sequence[Tuple[int, Iterable[Tuple[int, Answer]]]]
+                ) -> Tuple[List[Optional[GradeResult]], Dict[int, LessonBatch]]:
+    """Grade many (lesson_id, answers) submissions in one pass per lesson
+
+    keys maps lesson ids to answer keys taken with GradingEngine.questions().
+    The engine drops keys of lessons evicted from the lesson cache and
+    rebuilds reloaded ones as new lists, so the keys taken stay valid for
+    the whole batch. Answers are encoded as bit masks of chosen options
+    into one matrix per lesson, then compared with the answer key as whole
+    arrays. Gives the same scores as GradingEngine.grade. Submissions of
+    lessons missing from keys get None in the result list.
+    """
+    by_lesson: Dict[int, List[int]] = {}
+    for index, (lesson_id, _) in enumerate(submissions):
+        if lesson_id in keys:
+            by_lesson.setdefault(lesson_id, []).append(index)
+
+    results: List[Optional[GradeResult]] = [None] * len(submissions)
+    batches: Dict[int, LessonBatch] = {}
+    for lesson_id, indexes in by_lesson.items():
+        questions = keys[lesson_id]
+        by_id = {question.question_id: question for question in questions}
+        masks = np.zeros((len(indexes), len(questions)), dtype=np.uint64)
+        for row, index in enumerate(indexes):
+            for question_id, answer in submissions[index][1]:
+                question = by_id.get(question_id)
+                if question is not None:
+                    masks[row, question.position] = question.mask(answer)
+
+        correct_masks = np.array([question.correct_mask for question in questions], dtype=np.uint64)
+        partial = np.array([question.partial_credit for question in questions], dtype=bool)
+        points = (masks == correct_masks).astype(np.float64)
+        if partial.any():
+            hits = _popcount(masks & correct_masks)
+            misses = _popcount(masks & ~correct_masks)
+            partial_points = np.maximum(hits.astype(np.int64) - misses, 0) / _popcount(correct_masks)
+            points = np.where(partial, partial_points, points)
+
+        totals = points.sum(axis=1)
+        for row, index in enumerate(indexes):
+            results[index] = GradeResult(_score(float(totals[row])), len(questions))
+        batches[lesson_id] = LessonBatch(
+            lesson_id, [question.question_id for question in questions], indexes, points
+        )
+    return results, batches
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import json
+import logging
+import os
+import time
+
+# (mtime_ns, size) of the lesson files, a change in either means the lesson changed
+Signature = Tuple[Tuple[int, int], ...]
+
+class LessonStore:
+    """Lessons read on demand from content files into a bounded LRU cache
+
+    A lesson is "{id}.json" (title, subtitle, quiz) next to "{id}.html"
+    (the lesson body). Cached lessons are checked against the files at
+    most every check_interval seconds and reloaded when they changed, so
+    edits show up without restarting the webapp.
+    """
+
+    def __init__(self, directory: str = "content/lessons", cache_size: int = 32,
+                 check_interval: float = 1.0):
+        self.directory = directory
+        self.cache_size = cache_size
+        self.check_interval = check_interval
+        # lesson_id -> (lesson, file signature, time of last check), most recently used last
+        self._cache: "OrderedDict[int, Tuple[Dict[str, Any], Signature, float]]" = OrderedDict()
+        self._listeners: List[Callable[[int, Optional[Dict[str, Any]]], None]] = []
+
+    def add_listener(self, listener: Callable[[int, Optional[Dict[str, Any]]], None]) -> None:
+        """Call listener(lesson_id, lesson) when a lesson is (re)loaded, lesson is None when dropped"""
+        self._listeners.append(listener)
+
+    def _notify(self, lesson_id: int, lesson: Optional[Dict[str, Any]]) -> None:
+        for listener in self._listeners:
+            listener(lesson_id, lesson)
+
+    def _paths(self, lesson_id: int) -> Tuple[str, str]:
+        base = os.path.join(self.directory, str(lesson_id))
+        return f"{base}.json", f"{base}.html"
+
+    def _signature(self, lesson_id: int) -> Optional[Signature]:
+        """Stat lesson files, None if the lesson does not exist"""
+        meta_path, content_path = self._paths(lesson_id)
+        try:
+            meta = os.stat(meta_path)
+        except FileNotFoundError:
+            return None
+        try:
+            content = os.stat(content_path)
+            content_signature = (content.st_mtime_ns, content.st_size)
+        except FileNotFoundError:
+            content_signature = (0, 0)
+        return (meta.st_mtime_ns, meta.st_size), content_signature
+
+    def _read(self, lesson_id: int) -> Dict[str, Any]:
+        meta_path, content_path = self._paths(lesson_id)
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            lesson = json.load(f)
+        try:
+            with open(content_path, 'r', encoding='utf-8') as f:
+                lesson["content"] = f.read()
+        except FileNotFoundError:
+            lesson.setdefault("content", "")
+        lesson.setdefault("quiz", [])
+        return lesson
+
+    def get(self, lesson_id: int) -> Optional[Dict[str, Any]]:
+        """Get lesson by id, None if there is no such lesson"""
+        now = time.monotonic()
+        cached = self._cache.get(lesson_id)
+        if cached is not None:
+            lesson, signature, checked_at = cached
+            if now - checked_at < self.check_interval:
+                self._cache.move_to_end(lesson_id)
+                return lesson
+        else:
+            signature = None
+
+        current = self._signature(lesson_id)
+        if current is None:
+            if cached is not None:
+                del self._cache[lesson_id]
+                self._notify(lesson_id, None)
+            return None
+        if current == signature:
+            self._cache[lesson_id] = (lesson, signature, now)
+            self._cache.move_to_end(lesson_id)
+            return lesson
+
+        try:
+            lesson = self._read(lesson_id)
+        except (OSError, ValueError):
+            # A half-written file during an edit, keep serving the old version
+            logging.exception(f"Failed to load lesson {lesson_id}")
+            if cached is None:
+                return None
+            self._cache[lesson_id] = (cached[0], cached[1], now)
+            return cached[0]
+        self._cache[lesson_id] = (lesson, current, now)
+        self._cache.move_to_end(lesson_id)
+        self._notify(lesson_id, lesson)
+        while len(self._cache) > self.cache_size:
+            evicted, _ = self._cache.popitem(last=False)
+            self._notify(evicted, None)
+        return lesson
+
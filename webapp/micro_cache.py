@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Set, Tuple
+import time
+
+class MicroCache:
+    """Short-lived cache of per-user responses, keyed (route, user_id, ...)
+
+    Entries live ttl seconds at most and are dropped as soon as the user
+    changes, so the TTL only bounds staleness if an invalidation is missed.
+    Reads started before an invalidation cannot store what they read, see
+    version().
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[float, bytes]]" = OrderedDict()
+        self._by_user: Dict[str, Set[Tuple[Hashable, ...]]] = {}
+        self._version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def version(self) -> int:
+        """Take before reading storage, pass to put()"""
+        return self._version
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires, body = entry
+        if expires <= time.monotonic():
+            self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Tuple[Hashable, ...], body: bytes, version: int) -> None:
+        """Store body unless something was invalidated since version() was taken"""
+        if not self.enabled or version != self._version:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, body)
+        self._entries.move_to_end(key)
+        self._by_user.setdefault(key[1], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop entries of one user, None drops everything"""
+        self._version += 1
+        if user_id is None:
+            self._entries.clear()
+            self._by_user.clear()
+            return
+        for key in self._by_user.pop(str(user_id), ()):
+            self._entries.pop(key, None)
+
+    def _discard(self, key: Tuple[Hashable, ...]) -> None:
+        self._entries.pop(key, None)
+        keys = self._by_user.get(key[1])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[key[1]]
@@ -0,0 +1,107 @@
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import gzip
+import hashlib
+
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class RenderedPage:
+    """One rendered page with its precompressed variants"""
+
+    __slots__ = ("body", "etag", "variants")
+
+    def __init__(self, html: str):
+        self.body = html.encode('utf-8')
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.etag = f'"{digest}"'
+        # Content-Encoding -> (body, etag), each encoding is its own representation
+        self.variants: Dict[str, Tuple[bytes, str]] = {}
+        compressed = gzip.compress(self.body, compresslevel=9, mtime=0)
+        if len(compressed) < len(self.body):
+            self.variants["gzip"] = (compressed, f'"{digest}-gzip"')
+        if brotli is not None:
+            compressed = brotli.compress(self.body, quality=11)
+            if len(compressed) < len(self.body):
+                self.variants["br"] = (compressed, f'"{digest}-br"')
+
+def accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    encodings = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        encodings[coding] = q
+    return encodings
+
+def not_modified(if_none_match: str, etag: str) -> bool:
+    """Check If-None-Match against the etag of the sent representation, weak comparison as RFC 9110 asks"""
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+class PageCache:
+    """Rendered pages by key, for pages whose output depends only on the key
+
+    A cached page is served without rendering, as a 304 when the client
+    already has it, otherwise in the best compressed variant the client
+    accepts.
+    """
+
+    def __init__(self, render: Callable[[Hashable], str]):
+        self.render = render
+        self._pages: Dict[Hashable, RenderedPage] = {}
+
+    def get(self, key: Hashable) -> RenderedPage:
+        page = self._pages.get(key)
+        if page is None:
+            page = RenderedPage(self.render(key))
+            self._pages[key] = page
+        return page
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one page (or every page), it is rendered again on next request"""
+        if key is None:
+            self._pages.clear()
+        else:
+            self._pages.pop(key, None)
+
+    def response(self, request: Request, key: Hashable) -> Response:
+        page = self.get(key)
+        headers = {
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        accepted = accepted_encodings(request.headers.get("accept-encoding", ""))
+        body, etag, coding = page.body, page.etag, None
+        for candidate in ("br", "gzip"):
+            if candidate in page.variants and accepted.get(candidate, 0) > 0:
+                (body, etag), coding = page.variants[candidate], candidate
+                break
+        headers["ETag"] = etag
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and not_modified(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        if coding is not None:
+            headers["Content-Encoding"] = coding
+        return Response(body, media_type="text/html", headers=headers)
@@ -0,0 +1,38 @@
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl
+import hashlib
+import hmac
+import json
+import time
+
+def validate_init_data(init_data: str, bot_token: str, max_age: float = 86400) -> Optional[Dict[str, Any]]:
+    """Return the user of Telegram WebApp initData if its signature holds, else None
+
+    Telegram signs initData with a key derived from the bot token, so
+    only it can produce a valid hash. max_age limits replaying an old
+    initData, 0 turns the check off.
+    """
+    if not init_data or not bot_token:
+        return None
+    fields = dict(parse_qsl(init_data, keep_blank_values=True))
+    received = fields.pop("hash", "")
+    data_check_string = "\n".join(f"{key}={value}" for key, value in sorted(fields.items()))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    expected = hmac.new(secret_key, data_check_string.encode(), hashlib.sha256).hexdigest()
+    # Bytes, compare_digest refuses str with non-ASCII characters
+    if not hmac.compare_digest(expected.encode(), received.encode()):
+        return None
+    if max_age:
+        try:
+            auth_date = int(fields.get("auth_date", "0"))
+        except ValueError:
+            return None
+        if time.time() - auth_date > max_age:
+            return None
+    try:
+        user = json.loads(fields.get("user", ""))
+    except ValueError:
+        return None
+    if not isinstance(user, dict) or "id" not in user:
+        return None
+    return user